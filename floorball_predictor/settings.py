@@ -21,6 +21,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tipovani.instrumentation.request_metrics_middleware',
+    'tipovani.routers.read_routing_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -34,21 +36,29 @@ ROOT_URLCONF = 'floorball_predictor.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'tipovani.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Zkompilované šablony se drží v paměti procesu
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tipovani.context_processors.user_points',
+                'tipovani.context_processors.live_events',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'floorball_predictor.wsgi.application'
+ASGI_APPLICATION = 'floorball_predictor.asgi.application'
 
 DATABASES = {
     'default': {
@@ -57,6 +67,62 @@ DATABASES = {
     }
 }
 
+# Produkční profil SQLite (DB_PROFILE=production): WAL, aby čtenáři neblokovali
+# zápisy, perzistentní spojení a samostatné čtecí spojení pro view jen pro čtení
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+
+SQLITE_PRAGMAS = '; '.join([
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',
+])
+
+if DB_PROFILE == 'production':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'timeout': 20,  # busy timeout v sekundách
+            'transaction_mode': 'IMMEDIATE',
+        },
+    })
+    DATABASES['read'] = {
+        **DATABASES['default'],
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS + '; PRAGMA query_only=ON',
+            'timeout': 20,
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['tipovani.routers.ReadConnectionRouter']
+
+# Názvy URL, jejichž GET požadavky čtou přes spojení 'read'
+READ_ONLY_VIEWS = {
+    'leaderboard',
+    'tipovani_k_zapasu',
+    'ostatni_poradi',
+    'porovnani',
+    'zamcene_zapasy',
+    'api:matches',
+    'api:match_tips',
+    'api:my_tips',
+    'api:leaderboard',
+}
+
+# Session a přihlášený uživatel se čtou ze sdílené cache, do DB se session
+# zapisuje jen při změně - odpadají dva SQL dotazy na každý request
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'shared'
+# Nová přihlášení ukládají do session CachedModelBackend; ModelBackend zůstává,
+# aby session vytvořené před jeho zavedením platily dál (bez odhlášení všech)
+AUTHENTICATION_BACKENDS = [
+    'tipovani.auth.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -83,6 +149,71 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        # Na hráče ~5 klíčů (přihlášený uživatel, body, okolí v tabulce, graf,
+        # fragment dashboardu) + karty zápasů podle tipu; výchozích 300 by při
+        # tisících hráčů neustále vyhazovalo - počítáno s rezervou pro ~5000 hráčů
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+    # Sdílená cache mezi procesy (data invalidovaná explicitním smazáním)
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},  # drží i session
+    },
+}
+
+# Maximální počet SQL dotazů na request podle názvu URL jako (teplá cache,
+# přestavba po změně verze bodování / prvním požadavku); při překročení se
+# zaloguje varování, s QUERY_BUDGET_STRICT (testy) se vyhodí výjimka
+QUERY_BUDGETS = {
+    'dashboard': (5, 14),
+    'zapasy': (4, 6),
+    'leaderboard': (1, 11),
+    'tipovani_k_zapasu': (3, 8),
+    'ostatni_poradi': (2, 6),
+    'porovnani': (2, 6),
+    'api:matches': (1, 2),
+    'api:my_tips': (1, 2),
+    'api:match_tips': (2, 5),
+    'api:leaderboard': (1, 2),
+}
+QUERY_BUDGET_STRICT = False
+
+# Živé události (SSE): vysílání v procesu, změny z workeru se hledají
+# v ScoringVersion každých EVENTS_POLL_INTERVAL sekund. Vyžadují ASGI server,
+# proto se zapínají jen tam (SSE_ENABLED=1); pod WSGI stránky spojení neotevírají
+SSE_ENABLED = os.environ.get('SSE_ENABLED') == '1'
+EVENTS_BROADCAST = 'tipovani.events.LocalBroadcast'
+EVENTS_POLL_INTERVAL = 5
+EVENTS_KEEPALIVE = 15
+
+# Přepočty běží ve workeru (manage.py run_jobs); True je zpracuje hned v requestu
+JOBS_EAGER = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'tipovani': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        # JSON řádek na každý request jen na vyžádání (REQUEST_LOG_LEVEL=INFO);
+        # překročené rozpočty dotazů se hlásí vždy
+        'tipovani.requests': {
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = '/login/'
@@ -4,5 +4,6 @@ from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include('tipovani.api_urls')),
     path('', include('tipovani.urls')),
 ]
\ No newline at end of file
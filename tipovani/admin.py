@@ -1,6 +1,6 @@
 # DJANGO_ADMIN
 from django.contrib import admin
-from .models import UserProfile, Team, Match, MatchTip, TeamRanking, TeamRankingItem
+from .models import UserProfile, Standing, Team, Match, MatchTip, TeamRanking, TeamRankingItem, TipSnapshot, Job, ScoreCorrection
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -8,6 +8,12 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_filter = ['points']
     search_fields = ['user__username']
 
+@admin.register(Standing)
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ['rank', 'user', 'points', 'previous_rank']
+    search_fields = ['user__username']
+    ordering = ['rank', 'user__username']
+
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
     list_display = ['name', 'position']
@@ -35,4 +41,21 @@ class TeamRankingAdmin(admin.ModelAdmin):
 @admin.register(TeamRankingItem)
 class TeamRankingItemAdmin(admin.ModelAdmin):
     list_display = ['ranking', 'team', 'position']
-    list_filter = ['team']
\ No newline at end of file
+    list_filter = ['team']
+
+@admin.register(TipSnapshot)
+class TipSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['match', 'tip_count', 'created_at']
+    readonly_fields = ['created_at']
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'key', 'status', 'progress', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['created_at', 'started_at', 'heartbeat_at', 'finished_at']
+
+@admin.register(ScoreCorrection)
+class ScoreCorrectionAdmin(admin.ModelAdmin):
+    list_display = ['match', 'created_at', 'tips_checked', 'tips_changed', 'points_delta']
+    readonly_fields = ['match', 'created_at', 'old_result', 'new_result', 'tips_checked',
+                       'tips_changed', 'points_delta', 'deltas']
@@ -0,0 +1,124 @@
+# API
+from functools import wraps
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from . import events, snapshots, standings
+from .models import Match, MatchTip, season_of
+
+MATCH_FIELDS = (
+    'id', 'home_team', 'opponent', 'datetime', 'location', 'question',
+    'is_finished', 'locked', 'home_score', 'away_score', 'correct_answer',
+)
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+
+
+def api_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return _json({'error': 'Nepřihlášený uživatel'}, status=401)
+        return await view(request, user, *args, **kwargs)
+    return wrapper
+
+
+@api_login_required
+async def matches(request, user):
+    now = timezone.now()
+    try:
+        season = int(request.GET.get('sezona', season_of(now)))
+    except ValueError:
+        return _json({'error': 'Neplatná sezóna'}, status=400)
+
+    queryset = Match.objects.in_season(season).with_lock_state(now).order_by('datetime')
+    if 'stav' in request.GET:
+        queryset = queryset.filter(is_finished=request.GET['stav'] == 'odehrane')
+
+    return _json({
+        'season': season,
+        'matches': [match async for match in queryset.values(*MATCH_FIELDS)],
+    })
+
+
+@api_login_required
+async def my_tips(request, user):
+    tips = MatchTip.objects.filter(user=user).order_by('match__datetime').values_list(
+        'match_id', 'home_score_tip', 'away_score_tip', 'question_answer', 'points_earned',
+    )
+    return _json({
+        'fields': ['match', 'home', 'away', 'answer', 'points'],
+        'tips': [list(tip) async for tip in tips],
+    })
+
+
+@api_login_required
+async def match_tips(request, user, match_id):
+    match = await Match.objects.with_lock_state().filter(pk=match_id).values(*MATCH_FIELDS).afirst()
+    if match is None:
+        return _json({'error': 'Zápas neexistuje'}, status=404)
+    if not match['locked']:
+        return _json({'error': 'Zápas ještě není uzamčen'}, status=403)
+
+    snapshot = await sync_to_async(snapshots.for_match)(Match(pk=match_id))
+    return _json({
+        'match': match,
+        'histogram': snapshot.histogram,
+        'outcomes': snapshot.outcomes,
+        'answers': snapshot.answers,
+        'fields': ['user', 'home', 'away', 'answer', 'points'],
+        'tips': [tip[1:] for tip in snapshot.tips],
+    })
+
+
+@api_login_required
+async def leaderboard(request, user):
+    rows, next_cursor = standings.split_page(
+        [standing async for standing in standings.page_query(standings.parse_cursor(request.GET.get('po')))]
+    )
+    return _json({
+        'fields': ['rank', 'previous_rank', 'user', 'points'],
+        'standings': [
+            [standing.rank, standing.previous_rank, standing.user.username, standing.points]
+            for standing in rows
+        ],
+        'next': next_cursor,
+    })
+
+
+@api_login_required
+async def event_stream(request, user):
+    # Dlouhé spojení potřebuje ASGI; pod WSGI by blokovalo celé vlákno
+    if not getattr(settings, 'SSE_ENABLED', False) or 'wsgi.version' in request.META:
+        return _json({'error': 'Živé události nejsou zapnuté (vyžadují ASGI server)'}, status=501)
+
+    broadcast = events.broadcast()
+    queue = await broadcast.subscribe()
+    keepalive = getattr(settings, 'EVENTS_KEEPALIVE', 15)
+
+    async def stream():
+        try:
+            yield f'retry: {keepalive * 1000}\n\n'
+            while True:
+                try:
+                    event_id, event, data = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # Komentář udrží spojení otevřené přes proxy
+                    yield ': keepalive\n\n'
+                    continue
+                yield events.format_event(event_id, event, data)
+        finally:
+            broadcast.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,13 @@
+#API_URLS
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('zapasy/', api.matches, name='matches'),
+    path('zapasy/<int:match_id>/tipy/', api.match_tips, name='match_tips'),
+    path('moje-tipy/', api.my_tips, name='my_tips'),
+    path('poradi/', api.leaderboard, name='leaderboard'),
+    path('udalosti/', api.event_stream, name='events'),
+]
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class TipovaniConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tipovani'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
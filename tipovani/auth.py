@@ -0,0 +1,39 @@
+# AUTH
+from asgiref.sync import sync_to_async
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .instrumentation import mark_rebuild
+
+# Uživatel (včetně hashe hesla) zůstává jen v paměti procesu, ne ve sdílené
+# souborové cache. Signál maže záznam jen v tomto procesu a hromadné
+# .update() signál obejde - změny v ostatních procesech se projeví nejpozději
+# po minutě
+USER_CACHE_TIMEOUT = 60
+
+
+def user_key(user_id):
+    return f'tipovani:auth_user:{user_id}'
+
+
+def invalidate_user(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    # Přihlášený uživatel se čte z cache procesu místo dotazu na auth_user;
+    # každé uložení uživatele záznam smaže (signál v signals.py)
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            mark_rebuild()
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        # request.auser() v async API volá tuto variantu
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,174 @@
+# CACHING
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from .instrumentation import mark_rebuild
+from .models import Match, ScoringVersion, TeamRanking, TeamRankingItem, UserProfile
+
+# Data klíčovaná verzí bodování stačí držet do dalšího výsledku
+VERSIONED_TIMEOUT = 60 * 60
+
+# Pořadí maže signál při změně týmů a tipů pořadí; hromadné zápisy signály
+# obcházejí, proto data po hodině vyprší i bez invalidace
+RANKINGS_KEY = 'tipovani:submitted_rankings'
+RANKINGS_TIMEOUT = 60 * 60
+
+
+def shared_cache():
+    # Sdílená mezi procesy, aby invalidace platila pro všechny workery
+    return caches['shared']
+
+
+def submitted_rankings():
+    data = shared_cache().get(RANKINGS_KEY)
+    if data is None:
+        mark_rebuild()
+        data = build_rankings()
+        shared_cache().set(RANKINGS_KEY, data, RANKINGS_TIMEOUT)
+    return data
+
+
+def invalidate_rankings():
+    shared_cache().delete(RANKINGS_KEY)
+
+
+def build_rankings():
+    rankings = (
+        TeamRanking.objects.filter(is_submitted=True)
+        .select_related('user')
+        .order_by('user__username')
+        .prefetch_related(Prefetch(
+            'items',
+            queryset=TeamRankingItem.objects.select_related('team').order_by('position'),
+        ))
+    )
+
+    cards = []
+    positions = {}
+    for ranking in rankings:
+        username = ranking.user.username
+        items = [{'position': item.position, 'team': item.team.name} for item in ranking.items.all()]
+        cards.append({'username': username, 'items': items})
+        for item in items:
+            positions[item['team'], username] = item['position']
+
+    # Matice tým × uživatel pro kompaktní zobrazení
+    usernames = [card['username'] for card in cards]
+    matrix = []
+    for team in sorted({team for team, _ in positions}):
+        row = [positions.get((team, username)) for username in usernames]
+        filled = [position for position in row if position is not None]
+        matrix.append({
+            'team': team,
+            'positions': row,
+            'average': sum(filled) / len(filled) if filled else None,
+        })
+    matrix.sort(key=lambda row: (row['average'] is None, row['average'], row['team']))
+
+    return {'cards': cards, 'usernames': usernames, 'matrix': matrix}
+
+
+def scoring_version(request=None):
+    # (verze, čas změny); v rámci jednoho requestu se čte jen jednou
+    if request is not None and hasattr(request, '_scoring_version'):
+        return request._scoring_version
+
+    state = ScoringVersion.objects.filter(pk=1).values_list('version', 'changed_at').first()
+    state = state or (0, datetime(2000, 1, 1, tzinfo=dt_timezone.utc))
+    if request is not None:
+        request._scoring_version = state
+    return state
+
+
+def bump_scoring_version(scored=False):
+    # Vrací novou verzi (posílá se i v živých událostech). scored=True značí
+    # skutečnou změnu bodů - jen na ni reagují živé události z jiných procesů
+    changes = {'version': F('version') + 1, 'changed_at': timezone.now()}
+    if scored:
+        changes['scored_version'] = F('version') + 1
+    updated = ScoringVersion.objects.filter(pk=1).update(**changes)
+    if not updated:
+        ScoringVersion.objects.get_or_create(pk=1, defaults={'version': 1, 'scored_version': int(scored)})
+    return ScoringVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+
+
+def bump_tip_version(user):
+    updated = UserProfile.objects.filter(user=user).update(tip_version=F('tip_version') + 1)
+    if not updated:
+        UserProfile.objects.get_or_create(user=user, defaults={'tip_version': 1})
+
+
+def tip_version(request):
+    if not hasattr(request, '_tip_version'):
+        request._tip_version = UserProfile.objects.filter(user=request.user).values_list(
+            'tip_version', flat=True
+        ).first()
+    return request._tip_version
+
+
+def fragment_version(request):
+    # Klíč fragmentů šablon: uživatel + verze jeho tipů + verze bodování (opravy výsledků)
+    version, _ = scoring_version(request)
+    return f'{request.user.pk}-{tip_version(request) or 0}-{version}'
+
+
+def versioned(request, key, builder):
+    version, _ = scoring_version(request)
+
+    def build():
+        mark_rebuild()
+        return builder()
+
+    return cache.get_or_set(f'tipovani:{key}:v{version}', build, VERSIONED_TIMEOUT)
+
+
+def user_points(request):
+    # Body v hlavičce stránky; view, které profil už načetlo, je předá přes request
+    if not hasattr(request, '_user_points'):
+        request._user_points = versioned(
+            request, f'points:{request.user.pk}',
+            lambda: UserProfile.objects.filter(user=request.user).values_list('points', flat=True).first() or 0,
+        )
+    return request._user_points
+
+
+def _conditional(request, *parts):
+    # Při čekajících zprávách (messages) se musí stránka vykreslit celá
+    if not request.user.is_authenticated or len(get_messages(request)):
+        return None
+    version, _ = scoring_version(request)
+    return '-'.join(str(part) for part in (version, request.user.pk, *parts))
+
+
+def _projection_stamp(request):
+    # Projekce se mění i uzamčením zápasu, ne jen novým výsledkem
+    from .projection import current
+
+    valid_until = current(request).valid_until
+    return int(valid_until.timestamp()) if valid_until else 0
+
+
+def leaderboard_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    return _conditional(request, request.GET.get('po', ''), _projection_stamp(request))
+
+
+def dashboard_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    return _conditional(request, tip_version(request), _projection_stamp(request))
+
+
+def match_tips_etag(request, match_id):
+    # Před uzamčením stránka přesměrovává - stav zámku musí být součástí ETagu
+    locked = Match.objects.filter(pk=match_id, datetime__lte=timezone.now() + timedelta(hours=1)).exists()
+    return _conditional(request, match_id, int(locked))
+
+
+def scoring_last_modified(request, *args, **kwargs):
+    return scoring_version(request)[1]
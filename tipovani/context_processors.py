@@ -0,0 +1,17 @@
+# CONTEXT_PROCESSORS
+from django.conf import settings
+
+from . import caching
+
+
+def user_points(request):
+    # Šablona volá funkci až při vypsání - stránky bez hlavičky nic nečtou
+    def points():
+        if not request.user.is_authenticated:
+            return 0
+        return caching.user_points(request)
+    return {'user_points': points}
+
+
+def live_events(request):
+    return {'sse_enabled': getattr(settings, 'SSE_ENABLED', False)}
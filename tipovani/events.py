@@ -0,0 +1,148 @@
+# EVENTS
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Match, ScoringVersion
+
+logger = logging.getLogger(__name__)
+
+MATCH_FINISHED = 'match-finished'
+POINTS_UPDATED = 'points-updated'
+STANDINGS_CHANGED = 'standings-changed'
+
+MATCH_EVENT_FIELDS = ('id', 'home_team', 'opponent', 'home_score', 'away_score')
+
+
+def format_event(event_id, event, data):
+    # Formát text/event-stream
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False, default=str)
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'
+
+
+class LocalBroadcast:
+    # Vysílání v rámci procesu: každý odběratel má vlastní asyncio.Queue.
+    # Události z jiných procesů (worker run_jobs) zachytí jeden sdílený poller,
+    # který hlídá ScoringVersion - jeden dotaz na proces, ne na klienta.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.last_id = 0
+        self.version = None
+        self.finished = None
+        self.poller = None
+
+    def publish(self, event, data):
+        # Lze volat z libovolného vlákna (synchronní view, bodování)
+        with self.lock:
+            self.last_id += 1
+            message = (self.last_id, event, data)
+            if 'version' in data:
+                self.version = max(self.version or 0, data['version'])
+            if event == MATCH_FINISHED and self.finished is not None:
+                self.finished.add(data['id'])
+            subscribers = list(self.subscribers)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, queue in subscribers:
+            if loop is current:
+                queue.put_nowait(message)
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    async def subscribe(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        with self.lock:
+            self.subscribers.add((loop, queue))
+            if self.poller is None or self.poller.done():
+                self.poller = loop.create_task(self.poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        with self.lock:
+            self.subscribers = {item for item in self.subscribers if item[1] is not queue}
+
+    async def poll(self):
+        interval = getattr(settings, 'EVENTS_POLL_INTERVAL', 5)
+        while self.subscribers:
+            try:
+                await self.check_database()
+            except Exception:
+                # Výpadek databáze nesmí poller ukončit - odběratelé by už nic nedostali
+                logger.exception('Kontrola živých událostí selhala')
+            await asyncio.sleep(interval)
+
+    async def check_database(self):
+        # Jen verze se skutečnou změnou bodů; nový hráč nebo import rozpisu
+        # zvyšují verzi kvůli cache, ale body ani pořadí nemění
+        version = await ScoringVersion.objects.filter(pk=1).values_list('scored_version', flat=True).afirst() or 0
+        if self.finished is None:
+            # První kontrola jen zapamatuje výchozí stav
+            self.finished = {pk async for pk in Match.objects.filter(is_finished=True).values_list('pk', flat=True)}
+            self.version = max(self.version or 0, version)
+            return
+        if version <= self.version:
+            return
+
+        new_matches = [
+            match async for match in Match.objects.filter(is_finished=True)
+            .exclude(pk__in=self.finished).values(*MATCH_EVENT_FIELDS)
+        ]
+        for match in new_matches:
+            self.publish(MATCH_FINISHED, match)
+        self.finished.update(match['id'] for match in new_matches)
+        self.publish(POINTS_UPDATED, {'version': version})
+        self.publish(STANDINGS_CHANGED, {'version': version})
+
+
+class RecordingBroadcast:
+    # Náhrada pro testy: události jen zaznamená, nepotřebuje event loop
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event, data):
+        self.events.append((event, data))
+
+    async def subscribe(self):
+        queue = asyncio.Queue()
+        for event_id, (event, data) in enumerate(self.events, start=1):
+            queue.put_nowait((event_id, event, data))
+        return queue
+
+    def unsubscribe(self, queue):
+        pass
+
+
+@lru_cache(maxsize=None)
+def broadcast():
+    return import_string(getattr(settings, 'EVENTS_BROADCAST', 'tipovani.events.LocalBroadcast'))()
+
+
+def publish_on_commit(event, data):
+    # Odběratelé nesmí vidět změny, které se ještě mohou vrátit
+    transaction.on_commit(lambda: broadcast().publish(event, data))
+
+
+def match_scored(match, result, version):
+    if match.is_finished:
+        publish_on_commit(MATCH_FINISHED, {field: getattr(match, field) for field in MATCH_EVENT_FIELDS})
+    publish_on_commit(POINTS_UPDATED, {
+        'match_id': match.pk, 'tips': result.tips, 'changed': result.changed, 'version': version,
+    })
+    if result.changed:
+        publish_on_commit(STANDINGS_CHANGED, {'version': version})
+
+
+def rankings_evaluated(result, version):
+    publish_on_commit(POINTS_UPDATED, {'changed': result.changed, 'version': version})
+    if result.changed:
+        publish_on_commit(STANDINGS_CHANGED, {'version': version})
@@ -0,0 +1,109 @@
+# EXPORTS
+import csv
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Match, MatchTip, TeamRankingItem
+from .routers import READ_ALIAS
+
+CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@dataclass
+class Dataset:
+    model: type
+    # (název sloupce, cesta pro values_list); první sloupec je vždy id
+    columns: tuple
+
+    @property
+    def header(self):
+        return [name for name, _ in self.columns]
+
+    def queryset(self, using):
+        return (
+            self.model._default_manager.using(using)
+            .order_by('pk')
+            .values_list(*(path for _, path in self.columns))
+        )
+
+
+DATASETS = {
+    'tipy': Dataset(MatchTip, (
+        ('id', 'id'),
+        ('user_id', 'user_id'),
+        ('username', 'user__username'),
+        ('match_id', 'match_id'),
+        ('home_score_tip', 'home_score_tip'),
+        ('away_score_tip', 'away_score_tip'),
+        ('question_answer', 'question_answer'),
+        ('points_earned', 'points_earned'),
+        ('question_point', 'question_point'),
+        ('created_at', 'created_at'),
+    )),
+    'zapasy': Dataset(Match, (
+        ('id', 'id'),
+        ('external_id', 'external_id'),
+        ('datetime', 'datetime'),
+        ('home_team', 'home_team'),
+        ('opponent', 'opponent'),
+        ('location', 'location'),
+        ('home_score', 'home_score'),
+        ('away_score', 'away_score'),
+        ('is_finished', 'is_finished'),
+        ('question', 'question'),
+        ('correct_answer', 'correct_answer'),
+    )),
+    'poradi': Dataset(TeamRankingItem, (
+        ('id', 'id'),
+        ('user_id', 'ranking__user_id'),
+        ('username', 'ranking__user__username'),
+        ('is_submitted', 'ranking__is_submitted'),
+        ('submitted_at', 'ranking__submitted_at'),
+        ('team_id', 'team_id'),
+        ('team', 'team__name'),
+        ('position', 'position'),
+    )),
+}
+
+
+def rows(dataset, chunk_size=CHUNK_SIZE):
+    if READ_ALIAS in settings.DATABASES:
+        # Ve WAL režimu čte samostatné spojení z jednoho snímku a zápisy neblokuje
+        yield from dataset.queryset(READ_ALIAS).iterator(chunk_size=chunk_size)
+        return
+
+    # Bez WAL by otevřený kurzor držel sdílený zámek po celou dobu exportu -
+    # po dávkách podle id se zámek uvolní mezi každými chunk_size řádky
+    last_id = 0
+    while True:
+        chunk = list(dataset.queryset(DEFAULT_DB_ALIAS).filter(pk__gt=last_id)[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+class _Echo:
+    # csv.writer zapisuje do "souboru", který řádek jen vrátí
+    def write(self, value):
+        return value
+
+
+def stream(name, export_format, chunk_size=CHUNK_SIZE):
+    dataset = DATASETS[name]
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(dataset.header)
+        for row in rows(dataset, chunk_size):
+            yield writer.writerow(row)
+    else:
+        for row in rows(dataset, chunk_size):
+            yield json.dumps(dict(zip(dataset.header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
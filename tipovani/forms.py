@@ -32,13 +32,14 @@ class MatchTipForm(forms.ModelForm):
 class TeamRankingForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        teams = Team.objects.all().order_by('name')
+        # Pozic je tolik, kolik je týmů - seznam zároveň dává jejich počet bez dalšího dotazu
+        teams = list(Team.objects.all().order_by('name'))
         
         for i, team in enumerate(teams, 1):
             self.fields[f'team_{team.id}'] = forms.IntegerField(
                 label=team.name,
                 min_value=1,
-                max_value=14,
+                max_value=len(teams),
                 widget=forms.NumberInput(attrs={
                     'class': 'form-control',
                     'style': 'width: 80px;'
@@ -57,6 +58,18 @@ class MatchForm(forms.ModelForm):
         }
 
 
+class MatchImportForm(forms.Form):
+    schedule = forms.FileField(
+        label='Rozpis (CSV nebo .ics)',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.ics,text/csv,text/calendar'})
+    )
+    dry_run = forms.BooleanField(
+        label='Pouze zkontrolovat',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+
 class MatchResultForm(forms.ModelForm):
     class Meta:
         model = Match
@@ -67,16 +80,22 @@ class MatchResultForm(forms.ModelForm):
             'correct_answer': forms.Select(choices=[(True, 'Ano'), (False, 'Ne')], attrs={'class': 'form-control'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Model skóre povoluje prázdné (neodehraný zápas), zadaný výsledek ho ale potřebuje
+        self.fields['home_score'].required = True
+        self.fields['away_score'].required = True
+
 class TeamCorrectRankingForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        teams = Team.objects.all().order_by('name')
+        teams = list(Team.objects.all().order_by('name'))
         
         for team in teams:
             self.fields[f'team_{team.id}'] = forms.IntegerField(
                 label=team.name,
                 min_value=1,
-                max_value=14,
+                max_value=len(teams),
                 widget=forms.NumberInput(attrs={
                     'class': 'form-control',
                     'style': 'width: 80px;'
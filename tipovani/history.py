@@ -0,0 +1,95 @@
+# HISTORY
+from collections import defaultdict
+
+from .models import Match, MatchTip, StandingHistory, UserProfile, season_bounds, season_of
+from .standings import dense_ranks
+
+CHART_WIDTH = 600
+CHART_HEIGHT = 200
+
+
+def record(match):
+    # Přepíše historii od daného zápasu do konce sezóny; u posledního
+    # odehraného zápasu (běžný případ) je to jen jeden zápas
+    season = season_of(match.datetime)
+    finished = list(
+        Match.objects.in_season(season).filter(is_finished=True)
+        .order_by('datetime', 'id').values_list('id', 'datetime')
+    )
+    position = (match.datetime, match.pk)
+    start = next((i for i, (pk, kickoff) in enumerate(finished) if (kickoff, pk) >= position), len(finished))
+    replayed = finished[start:]
+
+    StandingHistory.objects.filter(match_id__in=[match.pk] + [pk for pk, _ in replayed]).delete()
+    if not replayed:
+        return 0
+
+    cumulative = dict.fromkeys(UserProfile.objects.values_list('user_id', flat=True), 0)
+    if start:
+        cumulative.update(
+            StandingHistory.objects.filter(match_id=finished[start - 1][0]).values_list('user_id', 'points')
+        )
+
+    earned = defaultdict(list)
+    for match_id, user_id, points in MatchTip.objects.filter(
+        match_id__in=[pk for pk, _ in replayed]
+    ).values_list('match_id', 'user_id', 'points_earned'):
+        earned[match_id].append((user_id, points))
+
+    rows = []
+    for match_id, kickoff in replayed:
+        for user_id, points in earned[match_id]:
+            cumulative[user_id] = cumulative.get(user_id, 0) + points
+        ordered = sorted(cumulative.items(), key=lambda item: -item[1])
+        ranks = dense_ranks([points for _, points in ordered])
+        rows.extend(
+            StandingHistory(user_id=user_id, match_id=match_id, kickoff=kickoff, points=points, rank=rank)
+            for (user_id, points), rank in zip(ordered, ranks)
+        )
+    StandingHistory.objects.bulk_create(rows, batch_size=1000)
+    return len(replayed)
+
+
+def rebuild():
+    StandingHistory.objects.all().delete()
+    seasons = {}
+    for match in Match.objects.filter(is_finished=True).order_by('datetime', 'id').only('id', 'datetime'):
+        seasons.setdefault(season_of(match.datetime), match)
+    for match in seasons.values():
+        record(match)
+
+
+def for_user(user, season):
+    # Jedno čtení přes index (user, kickoff)
+    start, end = season_bounds(season)
+    return list(
+        StandingHistory.objects.filter(user=user, kickoff__gte=start, kickoff__lt=end)
+        .order_by('kickoff').values_list('kickoff', 'points', 'rank')
+    )
+
+
+def chart(rows):
+    # Body lomené čáry pro SVG graf; 1. místo nahoře
+    if not rows:
+        return None
+    worst = max(rank for _, _, rank in rows)
+    step = CHART_WIDTH / max(len(rows) - 1, 1)
+    scale = (CHART_HEIGHT - 20) / max(worst - 1, 1)
+    points = [
+        {
+            'x': round(i * step, 1),
+            'y': round(10 + (rank - 1) * scale, 1),
+            'kickoff': kickoff,
+            'points': points,
+            'rank': rank,
+        }
+        for i, (kickoff, points, rank) in enumerate(rows)
+    ]
+    return {
+        'width': CHART_WIDTH,
+        'height': CHART_HEIGHT,
+        'polyline': ' '.join(f"{point['x']},{point['y']}" for point in points),
+        'points': points,
+        'best': min(rank for _, _, rank in rows),
+        'worst': worst,
+    }
@@ -0,0 +1,227 @@
+# IMPORTERS
+import csv
+import io
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import Match, TipSnapshot, season_of
+
+DEFAULT_HOME_TEAM = Match._meta.get_field('home_team').default
+DEFAULT_QUESTION = 'Nová otázka?'
+UPDATED_FIELDS = ['home_team', 'opponent', 'datetime', 'location', 'question']
+CSV_DATETIME_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%d.%m.%Y %H:%M', '%d. %m. %Y %H:%M')
+
+
+class ScheduleError(Exception):
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+@dataclass
+class ImportResult:
+    created: int
+    updated: int
+    unchanged: int
+
+
+def natural_key(home_team, opponent, location, moment):
+    # Klíč pro řádky bez UID - nezávisí na čase výkopu, ten se smí měnit
+    return f'{home_team}|{opponent}|{location}|{season_of(moment)}'
+
+
+def sniff_dialect(text):
+    # Sniffer selže na hlavičce s jediným sloupcem - pak výchozí čárky
+    try:
+        return csv.Sniffer().sniff(text.split('\n', 1)[0], delimiters=',;\t')
+    except csv.Error:
+        return csv.excel
+
+
+def parse_csv(text):
+    # Sloupce: uid (nepovinný), opponent, datetime, location, question, home_team (nepovinný)
+    if not text.strip():
+        return [], ['Soubor je prázdný']
+    dialect = sniff_dialect(text)
+    rows = []
+    errors = []
+    for number, record in enumerate(csv.DictReader(io.StringIO(text), dialect=dialect), start=2):
+        record = {key.strip().lower(): (value or '').strip() for key, value in record.items() if key}
+        moment = None
+        for fmt in CSV_DATETIME_FORMATS:
+            try:
+                moment = timezone.make_aware(datetime.strptime(record.get('datetime', ''), fmt))
+                break
+            except ValueError:
+                continue
+        if moment is None:
+            errors.append(f'Řádek {number}: neplatné datum "{record.get("datetime", "")}"')
+            continue
+        rows.append({
+            'uid': record.get('uid') or None,
+            'home_team': record.get('home_team') or DEFAULT_HOME_TEAM,
+            'opponent': record.get('opponent', ''),
+            'datetime': moment,
+            'location': record.get('location', ''),
+            'question': record.get('question', ''),
+            'line': number,
+        })
+    return rows, errors
+
+
+def _unfold(text):
+    # RFC 5545: pokračovací řádky začínají mezerou nebo tabulátorem
+    return re.sub(r'\r?\n[ \t]', '', text).splitlines()
+
+
+def _unescape(value):
+    return (
+        value.replace('\\n', '\n').replace('\\N', '\n')
+        .replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+    )
+
+
+def _parse_ics_datetime(value, params):
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ').replace(tzinfo=dt_timezone.utc)
+    moment = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    if 'TZID' in params:
+        try:
+            return moment.replace(tzinfo=ZoneInfo(params['TZID']))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.make_aware(moment)
+
+
+def parse_ics(text):
+    # SUMMARY "Domácí vs Hosté", DTSTART, LOCATION, DESCRIPTION = otázka k zápasu
+    rows = []
+    errors = []
+    event = None
+    for number, line in enumerate(_unfold(text), start=1):
+        if line == 'BEGIN:VEVENT':
+            event = {'line': number}
+            continue
+        if line == 'END:VEVENT' and event is not None:
+            summary = event.get('SUMMARY', '')
+            home_team, separator, opponent = summary.partition(' vs ')
+            if not separator:
+                home_team, opponent = DEFAULT_HOME_TEAM, summary
+            if 'DTSTART' not in event:
+                errors.append(f'Událost na řádku {event["line"]}: chybí DTSTART')
+            else:
+                try:
+                    moment = _parse_ics_datetime(*event['DTSTART'])
+                except ValueError:
+                    errors.append(f'Událost na řádku {event["line"]}: neplatné DTSTART')
+                else:
+                    rows.append({
+                        'uid': event.get('UID') or None,
+                        'home_team': home_team.strip() or DEFAULT_HOME_TEAM,
+                        'opponent': opponent.strip(),
+                        'datetime': moment,
+                        'location': event.get('LOCATION', ''),
+                        'question': event.get('DESCRIPTION', ''),
+                        'line': event['line'],
+                    })
+            event = None
+            continue
+        if event is None or ':' not in line:
+            continue
+
+        name, value = line.split(':', 1)
+        name, *raw_params = name.split(';')
+        params = dict(param.split('=', 1) for param in raw_params if '=' in param)
+        if name == 'DTSTART':
+            event['DTSTART'] = (value, params)
+        elif name in ('UID', 'SUMMARY', 'LOCATION', 'DESCRIPTION'):
+            event[name] = _unescape(value).strip()
+    return rows, errors
+
+
+def parse_schedule(text, fmt=None):
+    if fmt is None:
+        fmt = 'ics' if 'BEGIN:VCALENDAR' in text[:1000] else 'csv'
+    return parse_ics(text) if fmt == 'ics' else parse_csv(text)
+
+
+def validate(rows, errors):
+    keys = {}
+    max_lengths = {field: Match._meta.get_field(field).max_length for field in UPDATED_FIELDS if field != 'datetime'}
+    for row in rows:
+        for field in ('opponent', 'location'):
+            if not row[field]:
+                errors.append(f'Řádek {row["line"]}: chybí {field}')
+        for field, max_length in max_lengths.items():
+            if len(row[field]) > max_length:
+                errors.append(f'Řádek {row["line"]}: {field} je delší než {max_length} znaků')
+
+        row['key'] = row['uid'] or natural_key(row['home_team'], row['opponent'], row['location'], row['datetime'])
+        if row['key'] in keys:
+            errors.append(
+                f'Řádek {row["line"]}: duplicitní zápas s řádkem {keys[row["key"]]} (doplňte sloupec uid)'
+            )
+        keys[row['key']] = row['line']
+
+    if errors:
+        raise ScheduleError(errors)
+
+
+def import_matches(text, fmt=None, dry_run=False):
+    rows, errors = parse_schedule(text, fmt)
+    validate(rows, errors)
+
+    with transaction.atomic():
+        existing = {
+            match.external_id: match
+            for match in Match.objects.filter(external_id__in=[row['key'] for row in rows])
+        }
+
+        # Ručně přidané zápasy bez klíče se spárují podle soupeře, místa a sezóny
+        seasons = {season_of(row['datetime']) for row in rows}
+        for season in seasons:
+            for match in Match.objects.in_season(season).filter(external_id__isnull=True):
+                key = natural_key(match.home_team, match.opponent, match.location, match.datetime)
+                existing.setdefault(key, match)
+
+        created = []
+        updated = []
+        for row in rows:
+            values = {field: row[field] for field in UPDATED_FIELDS}
+            match = existing.get(row['key'])
+            if match is None:
+                values['question'] = values['question'] or DEFAULT_QUESTION
+                created.append(Match(external_id=row['key'], **values))
+                continue
+            if not values['question']:
+                # Rozpis bez otázek nesmí přepsat otázky zadané adminem
+                del values['question']
+            changed = match.external_id != row['key'] or any(
+                getattr(match, field) != value for field, value in values.items()
+            )
+            if changed:
+                match.external_id = row['key']
+                for field, value in values.items():
+                    setattr(match, field, value)
+                updated.append(match)
+
+        if not dry_run:
+            Match.objects.bulk_create(created, batch_size=500)
+            Match.objects.bulk_update(updated, UPDATED_FIELDS + ['external_id'], batch_size=500)
+            # Posunutý výkop mění zámek - snímek tipů se vytvoří znovu až po novém uzamčení
+            TipSnapshot.objects.filter(match__in=updated).delete()
+            if created or updated:
+                # Verze bodování je v klíčích fragmentů i ETagů stránek se zápasy
+                caching.bump_scoring_version()
+
+    return ImportResult(
+        created=len(created),
+        updated=len(updated),
+        unchanged=len(rows) - len(created) - len(updated),
+    )
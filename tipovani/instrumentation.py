@@ -0,0 +1,168 @@
+# INSTRUMENTATION
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.test.utils import CaptureQueriesContext
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger('tipovani.requests')
+
+# Metriky právě zpracovávaného requestu (přenáší se i do vláken async ORM)
+_current = ContextVar('tipovani_request_metrics', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    # Počítá SQL dotazy přes connection.execute_wrapper (funguje i bez DEBUG)
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def capture_queries():
+    # Dotazy ze všech spojení - v produkčním profilu čtení běží přes alias 'read';
+    # seznam se naplní po opuštění bloku
+    captured = []
+    with ExitStack() as stack:
+        contexts = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in settings.DATABASES]
+        yield captured
+    for context in contexts:
+        captured.extend(context.captured_queries)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.rebuilt = False
+
+
+def mark_rebuild():
+    # Request přestavěl data cachovaná do další verze bodování - platí pro něj
+    # studený rozpočet dotazů
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.rebuilt = True
+
+
+def budget_for(view, rebuilt):
+    # Rozpočet je číslo, nebo dvojice (teplá cache, přestavba po změně verze)
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+    if isinstance(budget, (tuple, list)):
+        return budget[1] if rebuilt else budget[0]
+    return budget
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Napojeno na connection_created - platí pro všechna spojení a vlákna
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.template_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _finish(request, response, metrics, started):
+    total = time.perf_counter() - started
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else None
+
+    response['Server-Timing'] = ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} SQL"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'view;dur={total * 1000:.1f}',
+    ])
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'view': view,
+        'status': response.status_code,
+        'queries': metrics.queries,
+        'db_ms': round(metrics.db_time * 1000, 2),
+        'template_ms': round(metrics.template_time * 1000, 2),
+        'view_ms': round(total * 1000, 2),
+        'rebuilt': metrics.rebuilt,
+    }))
+
+    budget = budget_for(view, metrics.rebuilt)
+    if budget is not None and metrics.queries > budget:
+        message = f'{view}: {metrics.queries} SQL dotazů, rozpočet {budget}'
+        if metrics.rebuilt:
+            message += ' (přestavba cache)'
+        if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(request, response, metrics, started)
+    else:
+        def middleware(request):
+            metrics = RequestMetrics()
+            token = _current.set(metrics)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return _finish(request, response, metrics, started)
+    return middleware
@@ -0,0 +1,207 @@
+# JOBS
+import logging
+import os
+import socket
+import traceback
+from dataclasses import asdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import scoring
+from .models import Job, Match
+
+logger = logging.getLogger(__name__)
+
+SCORE_MATCH = 'score_match'
+EVALUATE_RANKINGS = 'evaluate_rankings'
+
+# Běžící úloha bez heartbeatu déle než tohle se považuje za opuštěnou
+STALE_AFTER = timedelta(minutes=5)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _keep_first(queued, new):
+    # Přepočet čte aktuální stav zápasu - stačí původní payload (výsledek před první změnou)
+    return queued
+
+
+def _replace(queued, new):
+    return new
+
+
+MERGE = {
+    SCORE_MATCH: _keep_first,
+    EVALUATE_RANKINGS: _replace,
+}
+
+
+def enqueue(kind, key, payload=None, match=None):
+    # Stejná čekající úloha se nezdvojí, jen se sloučí payload
+    payload = payload or {}
+    for _ in range(3):
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(kind=kind, key=key, match=match, payload=payload)
+            break
+        except IntegrityError:
+            job = Job.objects.filter(key=key, status=Job.QUEUED).first()
+            if job is None:
+                # Čekající úlohu mezitím převzal worker - zkusit znovu
+                continue
+            merged = MERGE.get(kind, _replace)(job.payload, payload)
+            if merged != job.payload:
+                job.payload = merged
+                job.save(update_fields=['payload'])
+            break
+    else:
+        raise RuntimeError(f'Úlohu {key} se nepodařilo zařadit')
+
+    if settings.JOBS_EAGER:
+        # Bez workeru (vývoj) se fronta zpracuje hned po commitu
+        transaction.on_commit(lambda: run_pending(worker_name()))
+    return job
+
+
+def score_match_later(match, old_result):
+    return enqueue(SCORE_MATCH, f'match:{match.pk}', {'old_result': old_result}, match=match)
+
+
+def evaluate_rankings_later(positions):
+    return enqueue(
+        EVALUATE_RANKINGS, 'rankings',
+        {'positions': {str(team_id): position for team_id, position in positions.items()}},
+    )
+
+
+def requeue_stale():
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - STALE_AFTER)
+    for job_id in stale.values_list('pk', flat=True):
+        # Heartbeat se ověří znovu přímo v UPDATE - mezitím mohl worker commitnout
+        # transakci s novým heartbeatem (v SQLite čeká UPDATE na její konec)
+        try:
+            with transaction.atomic():
+                stale.filter(pk=job_id).update(
+                    status=Job.QUEUED, worker='', message='Znovu zařazeno po výpadku workeru',
+                )
+        except IntegrityError:
+            # Mezitím přibyla čekající úloha se stejným klíčem, která práci zopakuje
+            stale.filter(pk=job_id).update(
+                status=Job.FAILED, error='Worker přestal odpovídat', finished_at=now,
+            )
+
+
+def claim(worker):
+    requeue_stale()
+    running = Job.objects.filter(status=Job.RUNNING).values('key')
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED)
+        .exclude(key__in=running)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+    for job_id in candidates:
+        now = timezone.now()
+        try:
+            # Podmíněný UPDATE je atomický i v SQLite - úlohu převezme jen jeden worker
+            with transaction.atomic():
+                claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+                    status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+                    progress=0, message='Spuštěno',
+                )
+        except IntegrityError:
+            # Jiný worker mezitím spustil úlohu se stejným klíčem
+            continue
+        if claimed:
+            return Job.objects.select_related('match').get(pk=job_id)
+    return None
+
+
+def _owned(job):
+    # Zápisy stavu jen dokud úlohu drží tento worker
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker)
+
+
+def report(job, progress, message):
+    _owned(job).update(progress=progress, message=message, heartbeat_at=timezone.now())
+
+
+def heartbeat(job):
+    # Volá se z přepočtu po dávkách; uvnitř jeho transakce se zapíše spolu s výsledkem
+    _owned(job).update(heartbeat_at=timezone.now())
+
+
+def _previous_succeeded(job):
+    # Rozdílový přepočet předpokládá, že body odpovídají původnímu výsledku -
+    # zápas dokončený mimo frontu (Django admin, generate_league) nemá žádnou
+    # úspěšnou předchozí úlohu a přepočítá se celý
+    previous = (
+        Job.objects.filter(key=job.key, created_at__lt=job.created_at)
+        .order_by('-created_at').values_list('status', flat=True).first()
+    )
+    return previous == Job.DONE
+
+
+def _score_match(job):
+    match = Match.objects.get(pk=job.match_id)
+    old_result = job.payload.get('old_result')
+    if scoring.is_correction(match, old_result) and _previous_succeeded(job):
+        report(job, 10, 'Přepočet tipů dotčených opravou výsledku')
+        result = scoring.correct_match(match, old_result, lambda: heartbeat(job))
+    else:
+        report(job, 10, 'Přepočet bodů za tipy')
+        result = scoring.score_match(match, lambda: heartbeat(job))
+    return asdict(result)
+
+
+def _evaluate_rankings(job):
+    report(job, 10, 'Vyhodnocení pořadí týmů')
+    result = scoring.evaluate_rankings({
+        int(team_id): position for team_id, position in job.payload['positions'].items()
+    }, lambda: heartbeat(job))
+    return asdict(result)
+
+
+HANDLERS = {
+    SCORE_MATCH: _score_match,
+    EVALUATE_RANKINGS: _evaluate_rankings,
+}
+
+
+def run(job):
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise ValueError(f'Neznámý typ úlohy: {job.kind}')
+        result = handler(job)
+    except Exception:
+        logger.exception('Úloha %s selhala', job.pk)
+        _owned(job).update(
+            status=Job.FAILED, message='Chyba', error=traceback.format_exc(), finished_at=timezone.now(),
+        )
+        return False
+
+    finished = _owned(job).update(
+        status=Job.DONE, progress=100, message='Hotovo', result=result, finished_at=timezone.now(),
+    )
+    if not finished:
+        # Úlohu mezitím převzal jiný worker - její stav zapíše on
+        logger.warning('Úloha %s už nepatří workeru %s', job.pk, job.worker)
+    return bool(finished)
+
+
+def run_pending(worker, limit=None):
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim(worker)
+        if job is None:
+            break
+        run(job)
+        processed += 1
+    return processed
@@ -0,0 +1,126 @@
+import logging
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from tipovani import scoring, tipping
+from tipovani.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Změří latenci čtení leaderboardu, zatímco souběžně zapisují tipy a výsledky'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=10.0, help='Délka každé fáze v sekundách')
+        parser.add_argument('--score-every', type=int, default=20,
+                            help='Každý n-tý zápis přepočítá body odehraného zápasu')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        users = list(User.objects.order_by('pk').values_list('pk', flat=True)[:500])
+        open_matches = list(
+            Match.objects.with_lock_state().filter(locked=False, is_finished=False).values_list('pk', flat=True)
+        )
+        finished = list(Match.objects.filter(is_finished=True).values_list('pk', flat=True))
+        if not users or not open_matches:
+            raise CommandError('Chybí uživatelé nebo otevřené zápasy - spusťte nejdřív generate_league')
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        self.stdout.write(
+            f'Profil: {getattr(settings, "DB_PROFILE", "default")}, journal_mode={journal_mode}, '
+            f'čtecí spojení: {"ano" if "read" in settings.DATABASES else "ne"}'
+        )
+        logging.getLogger('tipovani.requests').setLevel(logging.ERROR)
+
+        for writers in (0, options['writers']):
+            self.run_phase(users, open_matches, finished, writers, options)
+
+    def run_phase(self, users, open_matches, finished, writers, options):
+        stop = threading.Event()
+        latencies = []
+        writes = []
+        errors = []
+        lock = threading.Lock()
+
+        def reader(user_id):
+            client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[-1])
+            client.force_login(User.objects.get(pk=user_id))
+            local = []
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    try:
+                        response = client.get(reverse('leaderboard'))
+                        if response.status_code != 200:
+                            raise OperationalError(f'HTTP {response.status_code}')
+                    except OperationalError as exc:
+                        with lock:
+                            errors.append(str(exc))
+                        continue
+                    local.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections.close_all()
+            with lock:
+                latencies.extend(local)
+
+        def writer(seed):
+            rng = random.Random(seed)
+            count = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        if finished and count % options['score_every'] == options['score_every'] - 1:
+                            # Stejná práce jako přepočet po zadání výsledku
+                            scoring.score_match(Match.objects.get(pk=rng.choice(finished)))
+                        else:
+                            user = User(pk=rng.choice(users))
+                            tipping.save_tips(user, {
+                                match_id: {
+                                    'home_score_tip': rng.randint(0, 8),
+                                    'away_score_tip': rng.randint(0, 8),
+                                    'question_answer': rng.choice(['True', 'False']),
+                                }
+                                for match_id in rng.sample(open_matches, min(3, len(open_matches)))
+                            })
+                    except OperationalError as exc:
+                        with lock:
+                            errors.append(str(exc))
+                    count += 1
+            finally:
+                connections.close_all()
+            with lock:
+                writes.append(count)
+
+        threads = [threading.Thread(target=reader, args=(user_id,)) for user_id in users[:options['readers']]]
+        threads += [threading.Thread(target=writer, args=(options['seed'] + i,)) for i in range(writers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        if len(latencies) < 2:
+            raise CommandError('Příliš málo měření - prodlužte --duration')
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f'Zapisovatelů {writers}: čtení {len(latencies)} '
+            f'({len(latencies) / options["duration"]:.0f}/s), '
+            f'p50 {statistics.median(latencies):.1f} ms, p95 {quantiles[94]:.1f} ms, '
+            f'p99 {quantiles[98]:.1f} ms, max {max(latencies):.1f} ms; '
+            f'zápisů {sum(writes)} ({sum(writes) / options["duration"]:.0f}/s), chyb {len(errors)}'
+        )
+        for error in sorted(set(errors))[:5]:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
@@ -0,0 +1,86 @@
+import logging
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tipovani.instrumentation import capture_queries
+
+# Porovnávané varianty: původní DB session + ModelBackend a současné nastavení
+CONFIGURATIONS = {
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cache': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['tipovani.auth.CachedModelBackend'],
+    },
+}
+
+VIEWS = ['dashboard', 'zapasy', 'leaderboard', 'api:leaderboard']
+
+
+class Command(BaseCommand):
+    help = 'Porovná počet SQL dotazů a latenci requestů s DB session a se session v cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Uživatel, za kterého se měří (výchozí první uživatel)')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if options['username']:
+            user = User.objects.filter(username=options['username']).first()
+        else:
+            user = User.objects.order_by('pk').first()
+        if user is None:
+            raise CommandError('Uživatel neexistuje')
+
+        logging.getLogger('tipovani.requests').setLevel(logging.ERROR)
+        results = {}
+        for name, overrides in CONFIGURATIONS.items():
+            with override_settings(**overrides):
+                results[name] = self.measure(user, options['repeat'])
+
+        for view in VIEWS:
+            db, cached = results['db'][view], results['cache'][view]
+            self.stdout.write(
+                f'{view:18} SQL {db["queries"]:3} -> {cached["queries"]:3} '
+                f'(session/uživatel {db["auth_queries"]} -> {cached["auth_queries"]})  '
+                f'p50 {db["p50_ms"]:7.2f} -> {cached["p50_ms"]:7.2f} ms  '
+                f'p95 {db["p95_ms"]:7.2f} -> {cached["p95_ms"]:7.2f} ms'
+            )
+
+    def measure(self, user, repeat):
+        # Nový klient = nově načtený middleware podle přepsaného nastavení
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[-1])
+        client.force_login(user)
+        results = {}
+        for view in VIEWS:
+            url = reverse(view)
+            client.get(url)
+            timings = []
+            queries = auth_queries = 0
+            for _ in range(repeat):
+                with capture_queries() as captured:
+                    started = time.perf_counter()
+                    client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, len(captured))
+                auth_queries = max(auth_queries, sum(
+                    1 for query in captured
+                    if '"django_session"' in query['sql'] or 'FROM "auth_user"' in query['sql']
+                ))
+            results[view] = {
+                'queries': queries,
+                'auth_queries': auth_queries,
+                'p50_ms': statistics.median(timings),
+                'p95_ms': statistics.quantiles(timings, n=20)[18],
+            }
+        client.logout()
+        return results
@@ -0,0 +1,165 @@
+import itertools
+import json
+import logging
+import statistics
+import subprocess
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from tipovani import exports, urls
+from tipovani.instrumentation import budget_for, capture_queries
+from tipovani.models import Match
+
+# Odhlášení by ukončilo session, zbytek jsou jen GET požadavky
+SKIPPED = {'logout'}
+
+
+class Command(BaseCommand):
+    help = 'Změří latenci (p50/p95) a počet SQL dotazů všech URL aplikace tipovani'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', help='Uživatel, za kterého se měří (výchozí první admin)')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', default='bench_output.json')
+        parser.add_argument('--compare', help='Předchozí JSON výsledek pro porovnání')
+        parser.add_argument(
+            '--check-budgets',
+            action='store_true',
+            help='Skončí chybou, pokud některé view překročí QUERY_BUDGETS',
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['username'])
+        client = Client(SERVER_NAME=settings.ALLOWED_HOSTS[-1])
+        client.force_login(user)
+
+        # Logy jednotlivých requestů by zahltily výstup, rozpočty hlídá přímo benchmark
+        logging.getLogger('tipovani.requests').setLevel(logging.ERROR)
+
+        results = {}
+        for name, url in self.urls(user):
+            timings = []
+            queries = []
+            status = None
+            for _ in range(options['repeat']):
+                with capture_queries() as captured:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    if response.streaming:
+                        # Streamovaná odpověď čte databázi až při odesílání
+                        b''.join(response.streaming_content)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                status = response.status_code
+
+            quantiles = statistics.quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+            results[name] = {
+                'url': url,
+                'status': status,
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(quantiles[18], 2),
+                'queries': max(queries),
+                'warm_queries': queries[-1],
+                'budget': budget_for(name, rebuilt=True),
+                'warm_budget': budget_for(name, rebuilt=False),
+            }
+            # První request může přestavovat cache, poslední už běží nad teplou
+            over_budget = (
+                results[name]['budget'] is not None and max(queries) > results[name]['budget']
+                or results[name]['warm_budget'] is not None and queries[-1] > results[name]['warm_budget']
+            )
+            results[name]['over_budget'] = over_budget
+            self.stdout.write(
+                f'{name:22} {status}  p50 {results[name]["p50_ms"]:8.2f} ms  '
+                f'p95 {results[name]["p95_ms"]:8.2f} ms  SQL {max(queries)}/{queries[-1]}'
+                + (self.style.ERROR(
+                    f' > rozpočet {results[name]["budget"]}/{results[name]["warm_budget"]}'
+                ) if over_budget else '')
+            )
+
+        report = {
+            'commit': self.git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'user': user.username,
+            'repeat': options['repeat'],
+            'views': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'Výsledky uloženy do {options["output"]}'))
+
+        if options['compare']:
+            self.compare(options['compare'], results)
+
+        over = [name for name, result in results.items() if result['over_budget']]
+        if over and options['check_budgets']:
+            raise CommandError(f'Překročený rozpočet SQL dotazů: {", ".join(over)}')
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'Uživatel {username} neexistuje')
+        user = User.objects.filter(is_staff=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('Neexistuje žádný admin, zadejte --username')
+        return user
+
+    def urls(self, user):
+        # Parametrické URL dostanou uzamčený zápas (nejlépe odehraný), jiného
+        # uživatele a každou hodnotu z výčtů (exporty)
+        match = (
+            Match.objects.with_lock_state().filter(locked=True).order_by('-is_finished', '-datetime').first()
+            or Match.objects.order_by('datetime').first()
+        )
+        other = User.objects.exclude(pk=user.pk).order_by('pk').first() or user
+        values = {
+            'match_id': [match.pk] if match else [],
+            'user_id': [other.pk],
+            'dataset': sorted(exports.DATASETS),
+        }
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or pattern.name in SKIPPED:
+                continue
+            params = list(pattern.pattern.converters)
+            missing = [param for param in params if not values.get(param)]
+            if missing:
+                self.stderr.write(self.style.WARNING(
+                    f'{pattern.name}: přeskočeno, chybí hodnota pro {", ".join(missing)}'
+                ))
+                continue
+            for combination in itertools.product(*(values[param] for param in params)):
+                kwargs = dict(zip(params, combination))
+                # Varianty jedné URL se v reportu rozliší exportovanou sadou
+                label = f'{pattern.name}[{kwargs["dataset"]}]' if 'dataset' in kwargs else pattern.name
+                yield label, reverse(pattern.name, kwargs=kwargs)
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def compare(self, path, results):
+        with open(path) as previous_file:
+            previous = json.load(previous_file)
+        self.stdout.write(f'Porovnání s {previous.get("commit") or path}:')
+        for name, current in results.items():
+            old = previous.get('views', {}).get(name)
+            if old is None:
+                continue
+            self.stdout.write(
+                f'{name:22} p50 {current["p50_ms"] - old["p50_ms"]:+8.2f} ms  '
+                f'p95 {current["p95_ms"] - old["p95_ms"]:+8.2f} ms  '
+                f'SQL {current["queries"] - old["queries"]:+d}'
+            )
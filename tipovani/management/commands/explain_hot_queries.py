@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+from django.utils import timezone
+
+from tipovani import standings
+from tipovani.models import Match, MatchTip, TeamRanking, TeamRankingItem, UserProfile, season_of
+
+
+def hot_queries():
+    # (název, queryset, index / krok, který musí plán obsahovat)
+    now = timezone.now()
+    user = User(pk=0)
+    return [
+        (
+            'zapasy',
+            Match.objects.in_season(season_of(now)).filter(is_finished=False)
+            .with_lock_state(now).with_user_tip(user).order_by('datetime'),
+            'match_upcoming_idx',
+        ),
+        (
+            'zapasy_odehrane',
+            Match.objects.in_season(season_of(now)).filter(is_finished=True)
+            .with_lock_state(now).with_user_tip(user).order_by('-datetime'),
+            'match_finished_idx',
+        ),
+        ('admin_dashboard', Match.objects.order_by('-datetime')[:10], 'match_datetime_idx'),
+        (
+            'zamcene_zapasy',
+            Match.objects.filter(datetime__lte=now + timedelta(hours=1)).order_by('-datetime'),
+            'match_datetime_idx',
+        ),
+        ('leaderboard', standings.page_query(), 'standing_keyset_idx'),
+        ('profiles_by_points', UserProfile.objects.order_by('-points')[:50], 'profile_points_idx'),
+        ('submitted_rankings', TeamRanking.objects.filter(is_submitted=True), 'teamranking_submitted_idx'),
+        ('match_tips', MatchTip.objects.filter(match_id=0), 'tipovani_matchtip_match_id'),
+        ('user_tips', MatchTip.objects.filter(user=user).select_related('match'), 'tipovani_matchtip_user_id'),
+        (
+            'ranking_evaluation',
+            # Stejný dotaz jako scoring.evaluate_rankings - GROUP BY podle uživatele
+            # vede plán přes odevzdaná pořadí, položky i týmy se hledají podle klíče
+            TeamRankingItem.objects.filter(ranking__is_submitted=True, position=F('team__position'))
+            .values_list('ranking__user_id')
+            .annotate(hits=Count('id')),
+            'teamranking_submitted_idx',
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Vypíše EXPLAIN QUERY PLAN horkých dotazů a ověří použití indexů'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Skončí chybou, pokud některý dotaz nepoužívá očekávaný index',
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, queryset, index in hot_queries():
+            plan = queryset.explain()
+            uses_index = index in plan
+            if not uses_index:
+                failures.append(name)
+
+            status = self.style.SUCCESS('OK') if uses_index else self.style.ERROR(f'CHYBÍ {index}')
+            self.stdout.write(f'{name}: {status}')
+            for line in plan.splitlines():
+                self.stdout.write(f'    {line}')
+
+        if failures and options['check']:
+            raise CommandError(f'Dotazy bez očekávaného indexu: {", ".join(failures)}')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from tipovani import exports
+
+
+class Command(BaseCommand):
+    help = 'Vypíše tipy, zápasy nebo pořadí týmů jako CSV / JSON Lines (po dávkách, bez načtení celé tabulky)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', help='Cílový soubor (výchozí standardní výstup)')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = exports.stream(options['dataset'], options['format'], options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        if options['format'] == 'csv':
+            count -= 1
+        self.stderr.write(self.style.SUCCESS(f'Exportováno řádků: {count} do {options["output"]}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tipovani.snapshots import freeze_locked
+
+
+class Command(BaseCommand):
+    help = 'Zmrazí rozložení tipů u právě uzamčených zápasů (spouštět např. každou minutu z cronu)'
+
+    def handle(self, *args, **options):
+        created = freeze_locked()
+        self.stdout.write(self.style.SUCCESS(f'Nových snímků tipů: {created}'))
@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from tipovani import caching, standings
+from tipovani.models import Match, MatchTip, Team, TeamRanking, TeamRankingItem, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Vygeneruje syntetickou ligu (uživatelé, zápasy, tipy, pořadí) pro zátěžové testy'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--matches', type=int, default=200)
+        parser.add_argument('--teams', type=int, default=14)
+        parser.add_argument('--finished', type=float, default=0.7, help='Podíl odehraných zápasů')
+        parser.add_argument('--tip-coverage', type=float, default=1.0, help='Podíl zápasů, které uživatel tipne')
+        parser.add_argument('--prefix', default='synt', help='Prefix uživatelských jmen')
+        parser.add_argument('--password', default='synteticke-heslo')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            users = self.create_users(options)
+            teams = self.create_teams(options['teams'])
+            matches = self.create_matches(rng, options)
+            self.create_tips(rng, users, matches, options)
+            self.create_rankings(rng, users, teams, options['prefix'], batch_size)
+
+        # Body přes stejný kernel jako rescore_season
+        call_command('rescore_season', stdout=self.stdout)
+        standings.rebuild()
+        caching.bump_scoring_version(scored=True)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Syntetická liga vygenerována za {time.perf_counter() - started:.1f} s')
+        )
+
+    def create_users(self, options):
+        # Jeden hash pro všechny - PBKDF2 by jinak trval minuty
+        password = make_password(options['password'])
+        usernames = [f'{options["prefix"]}{i:05d}' for i in range(options['users'])]
+        # První syntetický uživatel je admin, aby šly měřit i admin stránky
+        User.objects.bulk_create(
+            [
+                User(username=username, password=password, is_staff=i == 0)
+                for i, username in enumerate(usernames)
+            ],
+            batch_size=options['batch_size'],
+            ignore_conflicts=True,
+        )
+        users = list(
+            User.objects.filter(username__startswith=options['prefix']).values_list('pk', flat=True)
+        )
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id) for user_id in users],
+            batch_size=options['batch_size'],
+            ignore_conflicts=True,
+        )
+        self.stdout.write(f'Uživatelů: {len(users)}')
+        return users
+
+    def create_teams(self, count):
+        existing = list(Team.objects.values_list('pk', flat=True))
+        missing = count - len(existing)
+        if missing > 0:
+            Team.objects.bulk_create(
+                [Team(name=f'Syntetický tým {len(existing) + i + 1}') for i in range(missing)],
+                ignore_conflicts=True,
+            )
+        teams = list(Team.objects.order_by('pk').values_list('pk', flat=True)[:count])
+        self.stdout.write(f'Týmů: {len(teams)}')
+        return teams
+
+    def create_matches(self, rng, options):
+        now = timezone.now()
+        count = options['matches']
+        finished = int(count * options['finished'])
+        matches = []
+        for i in range(count):
+            # Odehrané zápasy do minulosti, zbytek do budoucnosti, po 3 dnech
+            offset = timedelta(days=3 * (i - finished) + 1)
+            is_finished = i < finished
+            matches.append(Match(
+                opponent=f'Soupeř {i % 13 + 1}',
+                datetime=now + offset,
+                location='Syntetická hala',
+                question='Padne v zápase víc než 10 gólů?',
+                is_finished=is_finished,
+                home_score=rng.randint(0, 9) if is_finished else None,
+                away_score=rng.randint(0, 9) if is_finished else None,
+                correct_answer=rng.random() < 0.5 if is_finished else None,
+            ))
+        matches = Match.objects.bulk_create(matches, batch_size=options['batch_size'])
+        self.stdout.write(f'Zápasů: {len(matches)} (odehraných {finished})')
+        return [match.pk for match in matches]
+
+    def create_tips(self, rng, users, matches, options):
+        coverage = options['tip_coverage']
+        tips = []
+        total = 0
+        for user_id in users:
+            for match_id in matches:
+                if rng.random() >= coverage:
+                    continue
+                tips.append(MatchTip(
+                    user_id=user_id,
+                    match_id=match_id,
+                    home_score_tip=rng.randint(0, 9),
+                    away_score_tip=rng.randint(0, 9),
+                    question_answer=rng.choice((True, False, None)),
+                ))
+            if len(tips) >= options['batch_size']:
+                MatchTip.objects.bulk_create(tips, batch_size=options['batch_size'], ignore_conflicts=True)
+                total += len(tips)
+                tips = []
+        MatchTip.objects.bulk_create(tips, batch_size=options['batch_size'], ignore_conflicts=True)
+        total += len(tips)
+        self.stdout.write(f'Tipů: {total}')
+
+    def create_rankings(self, rng, users, teams, prefix, batch_size):
+        now = timezone.now()
+        TeamRanking.objects.bulk_create(
+            [TeamRanking(user_id=user_id, is_submitted=True, submitted_at=now) for user_id in users],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        rankings = TeamRanking.objects.filter(
+            user__username__startswith=prefix, items__isnull=True
+        ).values_list('pk', flat=True)
+
+        items = []
+        positions = list(range(1, len(teams) + 1))
+        for ranking_id in rankings:
+            rng.shuffle(positions)
+            items.extend(
+                TeamRankingItem(ranking_id=ranking_id, team_id=team_id, position=position)
+                for team_id, position in zip(teams, positions)
+            )
+        TeamRankingItem.objects.bulk_create(items, batch_size=batch_size, ignore_conflicts=True)
+        caching.invalidate_rankings()
+        self.stdout.write(f'Pořadí týmů: {len(items) // max(len(teams), 1)}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tipovani.importers import ScheduleError, import_matches
+
+
+class Command(BaseCommand):
+    help = 'Hromadně naimportuje rozpis zápasů z CSV nebo iCalendar (.ics) souboru'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ics'], help='Výchozí je detekce podle obsahu')
+        parser.add_argument('--dry-run', action='store_true', help='Pouze ověří a vypíše změny')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8-sig') as schedule:
+                text = schedule.read()
+        except OSError as exc:
+            raise CommandError(f'Soubor nelze načíst: {exc}')
+
+        try:
+            result = import_matches(text, options['format'], dry_run=options['dry_run'])
+        except ScheduleError as exc:
+            for error in exc.errors:
+                self.stderr.write(error)
+            raise CommandError(f'Rozpis obsahuje chyby ({len(exc.errors)}), nic nebylo naimportováno')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{"Kontrola" if options["dry_run"] else "Import"} dokončen: nových {result.created}, '
+                f'změněných {result.updated}, beze změny {result.unchanged}'
+            )
+        )
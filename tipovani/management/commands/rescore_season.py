@@ -0,0 +1,120 @@
+import time
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tipovani import history, snapshots
+from tipovani.caching import bump_scoring_version
+from tipovani.models import Match, MatchTip, UserProfile
+from tipovani.scoring import refresh_profile_points, score_batch
+
+
+class Command(BaseCommand):
+    help = 'Přepočítá body všech tipů v sezóně najednou (po opravě pravidel)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Pouze porovná uložené body s přepočtem, nic nezapisuje',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--show', type=int, default=20, help='Kolik rozdílů vypsat')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        # Načíst dvojice (tip, výsledek) odehraných zápasů jako ploché sloupce
+        columns = defaultdict(list)
+        rows = MatchTip.objects.filter(match__is_finished=True).values_list(
+            'id', 'user_id', 'match_id', 'home_score_tip', 'away_score_tip', 'question_answer',
+            'points_earned', 'question_point',
+            'match__home_score', 'match__away_score', 'match__correct_answer',
+        ).order_by('id')
+        names = (
+            'id', 'user_id', 'match_id', 'home_tip', 'away_tip', 'answer', 'points', 'question_point',
+            'home_score', 'away_score', 'correct_answer',
+        )
+        for row in rows.iterator(chunk_size=options['chunk_size']):
+            for name, value in zip(names, row):
+                columns[name].append(value)
+
+        points, question = score_batch(
+            columns['home_tip'], columns['away_tip'], columns['answer'],
+            columns['home_score'], columns['away_score'], columns['correct_answer'],
+        )
+
+        changed = []
+        user_totals = defaultdict(int)
+        for i, tip_id in enumerate(columns['id']):
+            user_totals[columns['user_id'][i]] += points[i]
+            if points[i] != columns['points'][i] or question[i] != columns['question_point'][i]:
+                changed.append(MatchTip(
+                    id=tip_id, user_id=columns['user_id'][i], match_id=columns['match_id'][i],
+                    points_earned=points[i], question_point=question[i],
+                ))
+
+        scored = len(columns['id'])
+
+        # Tipy na neodehrané zápasy nemají mít žádné body
+        unfinished = MatchTip.objects.filter(match__is_finished=False).exclude(
+            points_earned=0, question_point=0
+        ).values_list('id', 'user_id', 'match_id', 'points_earned')
+        for tip_id, user_id, match_id, old_points in unfinished:
+            columns['id'].append(tip_id)
+            columns['user_id'].append(user_id)
+            columns['points'].append(old_points)
+            changed.append(MatchTip(id=tip_id, user_id=user_id, match_id=match_id, points_earned=0, question_point=0))
+
+        self.stdout.write(
+            f'Tipů na odehrané zápasy: {scored}, ke změně: {len(changed)} '
+            f'({time.perf_counter() - started:.2f} s)'
+        )
+
+        if options['verify']:
+            self.verify(columns, changed, user_totals, options['show'])
+            return
+
+        with transaction.atomic():
+            MatchTip.objects.bulk_update(changed, ['points_earned', 'question_point'], batch_size=500)
+            # Zmražené snímky tipů drží body zvlášť - musí se změnit spolu s tipy
+            points_by_match = defaultdict(dict)
+            for tip in changed:
+                points_by_match[tip.match_id][tip.user_id] = tip.points_earned
+            snapshots.refresh_points_many(points_by_match)
+            refresh_profile_points(User.objects.all())
+            history.rebuild()
+            Match.objects.update(scoring_version=bump_scoring_version(scored=True))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Body byly přepočítány ({time.perf_counter() - started:.2f} s)'
+            )
+        )
+
+    def verify(self, columns, changed, user_totals, show):
+        stored = {tip_id: i for i, tip_id in enumerate(columns['id'])}
+        for tip in changed[:show]:
+            i = stored[tip.id]
+            self.stdout.write(
+                f'  tip {tip.id} (uživatel {columns["user_id"][i]}): '
+                f'{columns["points"][i]} -> {tip.points_earned}'
+            )
+
+        profile_diffs = [
+            (username, points, user_totals.get(user_id, 0) + ranking_points)
+            for user_id, username, points, ranking_points in UserProfile.objects.values_list(
+                'user_id', 'user__username', 'points', 'ranking_points'
+            ).order_by('user__username')
+            if points != user_totals.get(user_id, 0) + ranking_points
+        ]
+        for username, points, expected in profile_diffs[:show]:
+            self.stdout.write(f'  {username}: uloženo {points}, přepočet {expected}')
+
+        if changed or profile_diffs:
+            raise CommandError(
+                f'Nalezeny rozdíly: tipů {len(changed)}, profilů {len(profile_diffs)}'
+            )
+        self.stdout.write(self.style.SUCCESS('Uložené body odpovídají přepočtu'))
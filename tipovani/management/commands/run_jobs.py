@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tipovani.jobs import run_pending, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Worker fronty úloh (přepočet bodů, vyhodnocení pořadí) - běží, dokud se neukončí'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Zpracuje čekající úlohy a skončí')
+        parser.add_argument('--interval', type=float, default=1.0, help='Pauza mezi kontrolami fronty (s)')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        self.stdout.write(f'Worker {worker} spuštěn')
+        try:
+            while True:
+                processed = run_pending(worker)
+                if processed:
+                    self.stdout.write(f'Zpracováno úloh: {processed}')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} ukončen'))
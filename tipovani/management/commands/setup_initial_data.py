@@ -1,60 +1,174 @@
-from django.core.management.base import BaseCommand
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db import transaction
+
+from tipovani import caching, standings
+from tipovani.importers import sniff_dialect
 from tipovani.models import UserProfile, Team
 
+DEFAULT_USERS = [
+    ('AdamChoma', 'druhyAdam', False),
+    ('Bc.Peterkys', 'abbMistr68', False),
+    ("PanMarcel", 'Zkusenosti',False),
+    ('Host1', 'AdamNaMeZapomnel', False),
+    ('Host2', 'NereklJsemZeHraju', False),
+    ('TOP1CENTR', 'Hesloheslo', True)
+]
+
+DEFAULT_TEAMS = [
+    'ACEMA Sparta Praha',
+    'BA SOKOLI Pardubice',
+    'ESA logistika Tatran Střešovice',
+    'FAT PIPE FLORBAL CHODOV',
+    'FBC 4CLEAN Česká Lípa',
+    'FBC ČPP Bystroň Group OSTRAVA',
+    'FBC Liberec',
+    'FBŠ Hummel Hattrick Brno',
+    'Florbal Ústí',
+    'HDT.cz Florbal Vary Bohemians',
+    'Kanonýři Kladno',
+    'Předvýběr.CZ Florbal MB',
+    'TJ Sokol Královské Vinohrady',
+    'SC NATIOS Vítkovice',
+]
+
+TRUE_VALUES = {'1', 'true', 'ano', 'yes', 'a', 'y'}
+
+
+def _init_worker():
+    # Při spawn startu procesu není Django nastavené
+    django.setup()
+
+
+def _hash_password(password):
+    return make_password(password or None)
+
+
+def read_users(path):
+    # CSV se sloupci username, password, is_staff (nepovinný)
+    with open(path, encoding='utf-8-sig', newline='') as users_file:
+        text = users_file.read()
+    if not text.strip():
+        raise CommandError(f'Soubor {path} je prázdný')
+    dialect = sniff_dialect(text)
+
+    users = []
+    errors = []
+    seen = set()
+    for number, record in enumerate(csv.DictReader(text.splitlines(), dialect=dialect), start=2):
+        record = {key.strip().lower(): (value or '').strip() for key, value in record.items() if key}
+        username = record.get('username', '')
+        if not username:
+            errors.append(f'Řádek {number}: chybí uživatelské jméno')
+        elif len(username) > User._meta.get_field('username').max_length:
+            errors.append(f'Řádek {number}: příliš dlouhé uživatelské jméno')
+        elif username in seen:
+            errors.append(f'Řádek {number}: duplicitní uživatel {username}')
+        else:
+            seen.add(username)
+            users.append((username, record.get('password', ''), record.get('is_staff', '').lower() in TRUE_VALUES))
+    if errors:
+        raise CommandError('\n'.join(errors))
+    return users
+
+
+def read_teams(path):
+    with open(path, encoding='utf-8-sig') as teams_file:
+        return [line.strip() for line in teams_file if line.strip()]
+
+
 class Command(BaseCommand):
     help = 'Nastaví počáteční data pro aplikaci'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--users', help='CSV se sloupci username, password, is_staff')
+        parser.add_argument('--teams', help='Textový soubor s jedním týmem na řádek')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Počet procesů pro hashování hesel')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
     def handle(self, *args, **options):
-        # Vytvořit uživatele
-        users_data = [
-            ('AdamChoma', 'druhyAdam', False),
-            ('Bc.Peterkys', 'abbMistr68', False),
-            ("PanMarcel", 'Zkusenosti',False),
-            ('Host1', 'AdamNaMeZapomnel', False),
-            ('Host2', 'NereklJsemZeHraju', False),
-            ('TOP1CENTR', 'Hesloheslo', True)
-        ]
-        
-        for username, password, is_staff in users_data:
-            user, created = User.objects.get_or_create(
-                username=username,
-                defaults={
-                    'is_staff': is_staff,
-                    'is_superuser': is_staff,
-                }
+        users_data = read_users(options['users']) if options['users'] else DEFAULT_USERS
+        teams = read_teams(options['teams']) if options['teams'] else DEFAULT_TEAMS
+
+        with transaction.atomic():
+            self.create_users(users_data, options)
+            self.create_teams(teams)
+
+        self.stdout.write(
+            self.style.SUCCESS('Počáteční data byla úspěšně nastavena!')
+        )
+
+    def create_users(self, users_data, options):
+        started = time.perf_counter()
+        existing = set(
+            User.objects.filter(username__in=[username for username, _, _ in users_data])
+            .values_list('username', flat=True)
+        )
+        for username in sorted(existing):
+            self.stdout.write(f'Uživatel {username} již existuje')
+        new_users = [row for row in users_data if row[0] not in existing]
+        if not new_users:
+            return
+
+        # PBKDF2 je záměrně pomalý - hesla se hashují paralelně ve více procesech
+        passwords = [password for _, password, _ in new_users]
+        workers = max(1, min(options['workers'], len(passwords)))
+        if workers == 1:
+            hashes = [_hash_password(password) for password in passwords]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                hashes = list(pool.map(
+                    _hash_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))
+                ))
+        hashed = time.perf_counter()
+
+        created = User.objects.bulk_create(
+            [
+                User(username=username, password=password_hash, is_staff=is_staff, is_superuser=is_staff)
+                for (username, _, is_staff), password_hash in zip(new_users, hashes)
+            ],
+            batch_size=options['batch_size'],
+        )
+        # SQLite vrací id z bulk_create, jinak je načíst
+        user_ids = [user.pk for user in created if user.pk is not None]
+        if len(user_ids) != len(created):
+            user_ids = list(
+                User.objects.filter(username__in=[username for username, _, _ in new_users])
+                .values_list('pk', flat=True)
             )
-            if created:
-                user.set_password(password)
-                user.save()
-                UserProfile.objects.get_or_create(user=user)
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id) for user_id in user_ids],
+            batch_size=options['batch_size'],
+            ignore_conflicts=True,
+        )
+
+        # bulk_create neposílá post_save, do pořadí je přidat najednou
+        zero = dict.fromkeys(user_ids, 0)
+        standings.apply_deltas(zero, zero)
+        caching.bump_scoring_version()
+
+        if len(new_users) <= 20:
+            for username, _, _ in new_users:
                 self.stdout.write(f'Vytvořen uživatel: {username}')
-            else:
-                self.stdout.write(f'Uživatel {username} již existuje')
-        
-        # Vytvořit týmy
-        teams = [
-            'ACEMA Sparta Praha',
-            'BA SOKOLI Pardubice',
-            'ESA logistika Tatran Střešovice',
-            'FAT PIPE FLORBAL CHODOV',
-            'FBC 4CLEAN Česká Lípa',
-            'FBC ČPP Bystroň Group OSTRAVA',
-            'FBC Liberec',
-            'FBŠ Hummel Hattrick Brno',
-            'Florbal Ústí',
-            'HDT.cz Florbal Vary Bohemians',
-            'Kanonýři Kladno',
-            'Předvýběr.CZ Florbal MB',
-            'TJ Sokol Královské Vinohrady',
-            'SC NATIOS Vítkovice',
-        ]
-        
-        for team_name in teams:
-            team, created = Team.objects.get_or_create(name=team_name)
-            if created:
-                self.stdout.write(f'Vytvořen tým: {team_name}')
-        
+
+        finished = time.perf_counter()
         self.stdout.write(
-            self.style.SUCCESS('Počáteční data byla úspěšně nastavena!')
-        )
\ No newline at end of file
+            f'Vytvořeno uživatelů: {len(new_users)} za {finished - started:.2f} s '
+            f'({len(new_users) / (finished - started):.0f}/s; hashování {hashed - started:.2f} s '
+            f'v {workers} procesech, {len(new_users) / (hashed - started):.0f} hesel/s)'
+        )
+
+    def create_teams(self, teams):
+        existing = set(Team.objects.filter(name__in=teams).values_list('name', flat=True))
+        new_teams = [name for name in dict.fromkeys(teams) if name not in existing]
+        Team.objects.bulk_create([Team(name=name) for name in new_teams], ignore_conflicts=True)
+        for team_name in new_teams:
+            self.stdout.write(f'Vytvořen tým: {team_name}')
@@ -0,0 +1,232 @@
+# MATRIX
+import threading
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+
+from . import caching
+from .instrumentation import mark_rebuild
+from .models import Match, MatchTip, season_bounds
+from .scoring import outcome
+
+# Příznaky složek tipu v buňce matice
+TIPPED = 1
+WINNER = 2
+EXACT_HOME = 4
+EXACT_AWAY = 8
+QUESTION = 16
+
+MATCH_FIELDS = (
+    'id', 'datetime', 'home_team', 'opponent', 'home_score', 'away_score',
+    'correct_answer', 'scoring_version',
+)
+
+
+@dataclass
+class TipCell:
+    points: int
+    flags: int
+
+    @property
+    def tipped(self):
+        return bool(self.flags & TIPPED)
+
+    @property
+    def winner(self):
+        return bool(self.flags & WINNER)
+
+    @property
+    def exact(self):
+        return self.flags & (EXACT_HOME | EXACT_AWAY) == EXACT_HOME | EXACT_AWAY
+
+    @property
+    def question(self):
+        return bool(self.flags & QUESTION)
+
+
+@dataclass
+class MatchColumn:
+    id: int
+    datetime: object
+    home_team: str
+    opponent: str
+    home_score: int
+    away_score: int
+    scoring_version: int
+    # Indexováno řádkem uživatele; kratší sloupec = pozdější uživatelé bez tipu
+    points: array
+    flags: array
+
+    def cell(self, row):
+        if row is None or row >= len(self.points):
+            return TipCell(0, 0)
+        return TipCell(self.points[row], self.flags[row])
+
+
+@dataclass
+class UserStats:
+    matches: int
+    tipped: int = 0
+    points: int = 0
+    winners: int = 0
+    exact_scores: int = 0
+    questions: int = 0
+    best: int = 0
+
+    def _rate(self, hits):
+        return round(100 * hits / self.tipped) if self.tipped else 0
+
+    @property
+    def average(self):
+        return self.points / self.tipped if self.tipped else 0
+
+    @property
+    def winner_rate(self):
+        return self._rate(self.winners)
+
+    @property
+    def exact_rate(self):
+        return self._rate(self.exact_scores)
+
+    @property
+    def question_rate(self):
+        return self._rate(self.questions)
+
+
+@dataclass
+class HeadToHead:
+    wins: int
+    draws: int
+    losses: int
+    points: int
+    other_points: int
+    rows: list  # [(sloupec, buňka uživatele, buňka soupeře), ...]
+
+
+class PointsMatrix:
+    # Body a složky tipů uživatel × odehraný zápas v paměti procesu. Sloupce se
+    # po vytvoření nemění, obnova vrací novou matici se sdílenými sloupci -
+    # čtenáři v jiných vláknech tak nikdy nevidí rozpracovaný stav
+    def __init__(self, version=-1, rows=None, columns=None):
+        self.version = version
+        self.rows = rows or {}  # user_id -> řádek
+        self.columns = columns or {}  # match_id -> MatchColumn
+        self.ordered = sorted(self.columns.values(), key=lambda column: (column.datetime, column.id))
+
+    def refreshed(self, version):
+        # Znovu se načtou jen zápasy přepočtené od verze této matice
+        # Dokončený zápas bez skóre (ruční zásah v adminu) nelze vyhodnotit - do matice nepatří
+        finished = {row['id']: row for row in (
+            Match.objects.filter(is_finished=True)
+            .exclude(home_score__isnull=True).exclude(away_score__isnull=True)
+            .values(*MATCH_FIELDS)
+        )}
+        columns = {
+            match_id: column for match_id, column in self.columns.items()
+            if match_id in finished and finished[match_id]['scoring_version'] <= self.version
+        }
+        stale = [row for match_id, row in finished.items() if match_id not in columns]
+        rows = dict(self.rows)
+        if stale:
+            columns.update(self._load(stale, rows))
+        return PointsMatrix(version, rows, columns)
+
+    @staticmethod
+    def _load(matches, rows):
+        tips = defaultdict(list)
+        for match_id, user_id, home, away, answer, points in MatchTip.objects.filter(
+            match_id__in=[match['id'] for match in matches]
+        ).values_list(
+            'match_id', 'user_id', 'home_score_tip', 'away_score_tip', 'question_answer', 'points_earned',
+        ).iterator(chunk_size=5000):
+            tips[match_id].append((rows.setdefault(user_id, len(rows)), home, away, answer, points))
+
+        size = len(rows)
+        columns = {}
+        for match in matches:
+            points = array('b', bytes(size))
+            flags = array('B', bytes(size))
+            result = outcome(match['home_score'], match['away_score'])
+            for row, home, away, answer, earned in tips[match['id']]:
+                points[row] = earned
+                flags[row] = (
+                    TIPPED
+                    | WINNER * (outcome(home, away) == result)
+                    | EXACT_HOME * (home == match['home_score'])
+                    | EXACT_AWAY * (away == match['away_score'])
+                    | QUESTION * (answer is not None and answer == match['correct_answer'])
+                )
+            columns[match['id']] = MatchColumn(
+                id=match['id'],
+                datetime=match['datetime'],
+                home_team=match['home_team'],
+                opponent=match['opponent'],
+                home_score=match['home_score'],
+                away_score=match['away_score'],
+                scoring_version=match['scoring_version'],
+                points=points,
+                flags=flags,
+            )
+        return columns
+
+    def columns_in(self, season=None):
+        if season is None:
+            return self.ordered
+        start, end = season_bounds(season)
+        return [column for column in self.ordered if start <= column.datetime < end]
+
+    def series(self, user_id, season=None):
+        row = self.rows.get(user_id)
+        return [(column, column.cell(row)) for column in self.columns_in(season)]
+
+    def stats(self, user_id, season=None):
+        series = self.series(user_id, season)
+        stats = UserStats(matches=len(series))
+        for _, cell in series:
+            if not cell.tipped:
+                continue
+            stats.tipped += 1
+            stats.points += cell.points
+            stats.winners += cell.winner
+            stats.exact_scores += cell.exact
+            stats.questions += cell.question
+            stats.best = max(stats.best, cell.points)
+        return stats
+
+    def head_to_head(self, user_id, other_id, season=None):
+        row, other = self.rows.get(user_id), self.rows.get(other_id)
+        result = HeadToHead(wins=0, draws=0, losses=0, points=0, other_points=0, rows=[])
+        for column in self.columns_in(season):
+            mine, theirs = column.cell(row), column.cell(other)
+            result.rows.append((column, mine, theirs))
+            if not (mine.tipped or theirs.tipped):
+                continue
+            result.points += mine.points
+            result.other_points += theirs.points
+            if mine.points > theirs.points:
+                result.wins += 1
+            elif mine.points < theirs.points:
+                result.losses += 1
+            else:
+                result.draws += 1
+        return result
+
+
+_lock = threading.Lock()
+_matrix = None
+
+
+def current(request=None):
+    # Verze bodování se v requestu čte stejně i pro ETag, matice nestojí další dotaz
+    global _matrix
+    version, _ = caching.scoring_version(request)
+    matrix = _matrix
+    if matrix is None or matrix.version != version:
+        with _lock:
+            if _matrix is None or _matrix.version != version:
+                # Nižší verze (obnovená databáze) = načíst vše znovu
+                base = _matrix if _matrix is not None and _matrix.version < version else PointsMatrix()
+                mark_rebuild()
+                _matrix = base.refreshed(version)
+            matrix = _matrix
+    return matrix
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_standings(apps, schema_editor):
+    UserProfile = apps.get_model('tipovani', 'UserProfile')
+    Standing = apps.get_model('tipovani', 'Standing')
+
+    standings = []
+    rank = 0
+    last = None
+    for user_id, points in UserProfile.objects.order_by('-points').values_list('user_id', 'points'):
+        if points != last:
+            rank += 1
+            last = points
+        standings.append(Standing(user_id=user_id, points=points, rank=rank))
+    Standing.objects.bulk_create(standings, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0004_alter_match_correct_answer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField(default=0)),
+                ('rank', models.IntegerField(default=1)),
+                ('previous_rank', models.IntegerField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standing', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-points', 'user'], name='standing_keyset_idx')],
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:57
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def split_ranking_points(apps, schema_editor):
+    # Body za pořadí se dříve přičítaly do points (i opakovaně) - spočítat je
+    # znovu z aktuálních pozic týmů a points složit z tipů a pořadí
+    UserProfile = apps.get_model('tipovani', 'UserProfile')
+    MatchTip = apps.get_model('tipovani', 'MatchTip')
+    TeamRankingItem = apps.get_model('tipovani', 'TeamRankingItem')
+    Standing = apps.get_model('tipovani', 'Standing')
+
+    hits = dict(
+        TeamRankingItem.objects.filter(ranking__is_submitted=True, position=F('team__position'))
+        .values_list('ranking__user_id')
+        .annotate(hits=Count('id'))
+    )
+    profiles = list(UserProfile.objects.all())
+    for profile in profiles:
+        profile.ranking_points = hits.get(profile.user_id, 0) * 3
+    UserProfile.objects.bulk_update(profiles, ['ranking_points'], batch_size=500)
+
+    tip_total = (
+        MatchTip.objects.filter(user=OuterRef('user'))
+        .values('user')
+        .annotate(total=Sum('points_earned'))
+        .values('total')
+    )
+    UserProfile.objects.update(points=Coalesce(Subquery(tip_total), 0) + F('ranking_points'))
+
+    standings = list(Standing.objects.all())
+    points = dict(UserProfile.objects.values_list('user_id', 'points'))
+    for standing in standings:
+        standing.points = points.get(standing.user_id, 0)
+    ranks = {}
+    for value in sorted(set(points.values()), reverse=True):
+        ranks[value] = len(ranks) + 1
+    for standing in standings:
+        standing.rank = ranks.get(standing.points, 1)
+    Standing.objects.bulk_update(standings, ['points', 'rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0005_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='ranking_points',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(split_ranking_points, migrations.RunPython.noop),
+    ]
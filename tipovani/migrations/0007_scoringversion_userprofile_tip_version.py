@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0006_userprofile_ranking_points'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField(default=0)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='tip_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0007_scoringversion_userprofile_tip_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='teamrankingitem',
+            unique_together=set(),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['datetime'], name='match_datetime_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('is_finished', False)), fields=['datetime'], name='match_upcoming_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(condition=models.Q(('is_finished', True)), fields=['datetime'], name='match_finished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamranking',
+            index=models.Index(condition=models.Q(('is_submitted', True)), fields=['user'], name='teamranking_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['-points'], name='profile_points_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='teamrankingitem',
+            constraint=models.UniqueConstraint(fields=('ranking', 'team'), name='rankingitem_unique_team'),
+        ),
+        migrations.AddConstraint(
+            model_name='teamrankingitem',
+            constraint=models.UniqueConstraint(fields=('ranking', 'position'), name='rankingitem_unique_position'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0009_match_external_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TipSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tip_count', models.IntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('outcomes', models.JSONField(default=dict)),
+                ('answers', models.JSONField(default=dict)),
+                ('tips', models.JSONField(default=list)),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tip_snapshot', to='tipovani.match')),
+            ],
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_history(apps, schema_editor):
+    Match = apps.get_model('tipovani', 'Match')
+    MatchTip = apps.get_model('tipovani', 'MatchTip')
+    UserProfile = apps.get_model('tipovani', 'UserProfile')
+    StandingHistory = apps.get_model('tipovani', 'StandingHistory')
+
+    earned = {}
+    for match_id, user_id, points in MatchTip.objects.filter(match__is_finished=True).values_list(
+        'match_id', 'user_id', 'points_earned'
+    ):
+        earned.setdefault(match_id, []).append((user_id, points))
+
+    users = list(UserProfile.objects.values_list('user_id', flat=True))
+    season = None
+    rows = []
+    for match_id, kickoff in Match.objects.filter(is_finished=True).order_by('datetime', 'id').values_list(
+        'id', 'datetime'
+    ):
+        # Sezóna začíná 1. července
+        local = timezone.localtime(kickoff)
+        match_season = local.year if local.month >= 7 else local.year - 1
+        if match_season != season:
+            season = match_season
+            cumulative = dict.fromkeys(users, 0)
+        for user_id, points in earned.get(match_id, []):
+            cumulative[user_id] = cumulative.get(user_id, 0) + points
+
+        rank = 0
+        last = None
+        for user_id, points in sorted(cumulative.items(), key=lambda item: -item[1]):
+            if points != last:
+                rank += 1
+                last = points
+            rows.append(StandingHistory(user_id=user_id, match_id=match_id, kickoff=kickoff, points=points, rank=rank))
+    StandingHistory.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0011_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kickoff', models.DateTimeField()),
+                ('points', models.IntegerField()),
+                ('rank', models.IntegerField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_history', to='tipovani.match')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kickoff'], name='history_user_kickoff_idx')],
+                'constraints': [models.UniqueConstraint(fields=('match', 'user'), name='history_unique_match_user')],
+            },
+        ),
+        migrations.RunPython(populate_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0012_standinghistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCorrection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('old_result', models.JSONField(default=dict)),
+                ('new_result', models.JSONField(default=dict)),
+                ('tips_checked', models.IntegerField(default=0)),
+                ('tips_changed', models.IntegerField(default=0)),
+                ('points_delta', models.IntegerField(default=0)),
+                ('deltas', models.JSONField(default=dict)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='corrections', to='tipovani.match')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
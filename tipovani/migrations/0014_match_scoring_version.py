@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0013_scorecorrection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='scoring_version',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
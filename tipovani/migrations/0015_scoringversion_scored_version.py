@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tipovani', '0014_match_scoring_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoringversion',
+            name='scored_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -1,16 +1,70 @@
 # DJANGO_MODELS
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models import BooleanField, ExpressionWrapper, F, FilteredRelation, Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
+
+# Tipy se zamykají hodinu před začátkem zápasu
+LOCK_BEFORE_KICKOFF = timedelta(hours=1)
+
+def season_of(moment):
+    # Sezóna začíná 1. července - vrací rok začátku sezóny
+    local = timezone.localtime(moment)
+    return local.year if local.month >= 7 else local.year - 1
+
+def season_label(start_year):
+    return f"{start_year}/{str(start_year + 1)[-2:]}"
+
+def season_bounds(start_year):
+    # Polouzavřený interval [začátek, konec) sezóny
+    tz = timezone.get_current_timezone()
+    return datetime(start_year, 7, 1, tzinfo=tz), datetime(start_year + 1, 7, 1, tzinfo=tz)
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     points = models.IntegerField(default=0)
+    ranking_points = models.IntegerField(default=0)  # body za pořadí týmů (součást points)
+    tip_version = models.IntegerField(default=0)  # mění se při každé změně tipů / pořadí uživatele
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points'], name='profile_points_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.points} bodů"
 
+class ScoringVersion(models.Model):
+    # Globální čítač změn bodování (jediný řádek) - klíč pro cache a ETag
+    version = models.IntegerField(default=0)
+    scored_version = models.IntegerField(default=0)  # verze poslední skutečné změny bodů (živé události)
+    changed_at = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"Verze bodování {self.version}"
+
+class Standing(models.Model):
+    # Materializované pořadí - udržuje se přírůstky bodů při bodování
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='standing')
+    points = models.IntegerField(default=0)
+    rank = models.IntegerField(default=1)  # hustá pozice (shodné body = stejná pozice)
+    previous_rank = models.IntegerField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-points', 'user'], name='standing_keyset_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.rank}. {self.user.username} - {self.points} bodů"
+    
+    @property
+    def movement(self):
+        if self.previous_rank is None:
+            return 0
+        return self.previous_rank - self.rank
+
 class Team(models.Model):
     name = models.CharField(max_length=100, unique=True)
     position = models.IntegerField(null=True, blank=True)  # Pro správné pořadí od admina
@@ -23,6 +77,12 @@ class TeamRanking(models.Model):
     is_submitted = models.BooleanField(default=False)
     submitted_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            # Django filtruje booleany jako "WHERE is_submitted" - index proto musí být částečný
+            models.Index(fields=['user'], condition=Q(is_submitted=True), name='teamranking_submitted_idx'),
+        ]
+    
     def __str__(self):
         return f"Pořadí týmů - {self.user.username}"
 
@@ -32,12 +92,37 @@ class TeamRankingItem(models.Model):
     position = models.IntegerField()
     
     class Meta:
-        unique_together = ['ranking', 'team']
-        unique_together = ['ranking', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['ranking', 'team'], name='rankingitem_unique_team'),
+            models.UniqueConstraint(fields=['ranking', 'position'], name='rankingitem_unique_position'),
+        ]
     
     def __str__(self):
         return f"{self.ranking.user.username} - {self.team.name} na pozici {self.position}"
 
+class MatchQuerySet(models.QuerySet):
+    def in_season(self, start_year):
+        start, end = season_bounds(start_year)
+        return self.filter(datetime__gte=start, datetime__lt=end)
+    
+    def with_lock_state(self, now=None):
+        # datetime - 1h <= now, spočítané jednou v dotazu
+        now = now or timezone.now()
+        return self.annotate(locked=ExpressionWrapper(
+            Q(datetime__lte=now + LOCK_BEFORE_KICKOFF), output_field=BooleanField()
+        ))
+    
+    def with_user_tip(self, user):
+        return self.annotate(
+            user_tip=FilteredRelation('matchtip', condition=Q(matchtip__user=user)),
+        ).annotate(
+            tip_id=F('user_tip__id'),
+            tip_home=F('user_tip__home_score_tip'),
+            tip_away=F('user_tip__away_score_tip'),
+            tip_answer=F('user_tip__question_answer'),
+            tip_points=F('user_tip__points_earned'),
+        )
+
 class Match(models.Model):
     home_team = models.CharField(max_length=100, default="FBC ČPP Bystroň Group OSTRAVA")
     opponent = models.CharField(max_length=100)
@@ -49,9 +134,20 @@ class Match(models.Model):
     
     question = models.CharField(max_length=255)
     correct_answer = models.BooleanField(null=True, blank=True)  # bude vyplněno až po zápase
+    external_id = models.CharField(max_length=255, null=True, blank=True, unique=True)  # klíč z importu rozpisu
+    scoring_version = models.IntegerField(default=0, editable=False)  # verze bodování při posledním přepočtu zápasu
+    
+    objects = MatchQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['datetime'], name='match_datetime_idx'),
+            models.Index(fields=['datetime'], condition=Q(is_finished=False), name='match_upcoming_idx'),
+            models.Index(fields=['datetime'], condition=Q(is_finished=True), name='match_finished_idx'),
+        ]
     
     def is_locked(self):
-        return timezone.now() >= (self.datetime - timedelta(hours=1))
+        return timezone.now() >= (self.datetime - LOCK_BEFORE_KICKOFF)
     
     def __str__(self):
         return f"{self.home_team} vs {self.opponent} - {self.datetime.strftime('%d.%m.%Y %H:%M')}"
@@ -74,41 +170,132 @@ class MatchTip(models.Model):
     def calculate_points(self):
         if not self.match.is_finished:
             return 0
-        
-        points = 0
-        
-        # Správný vítěz
-        home_wins_tip = self.home_score_tip > self.away_score_tip
-        away_wins_tip = self.home_score_tip < self.away_score_tip
-        draw_tip = self.home_score_tip == self.away_score_tip
-        
-        home_wins_actual = self.match.home_score > self.match.away_score
-        away_wins_actual = self.match.home_score < self.match.away_score
-        draw_actual = self.match.home_score == self.match.away_score
-        
-        if (home_wins_tip and home_wins_actual) or (away_wins_tip and away_wins_actual) or (draw_tip and draw_actual):
-            points += 2
-        
-        # Přesný počet gólů domácích
-        if self.home_score_tip == self.match.home_score:
-            points += 2
-        
-        # Přesný počet gólů hostů
-        if self.away_score_tip == self.match.away_score:
-            points += 2
-        
-        # Bonus za perfektní tip
-        if (self.home_score_tip == self.match.home_score and 
-            self.away_score_tip == self.match.away_score):
-            points += 2  # Celkem 8 bodů (2+2+2+2)
-        
-        if self.question_answer is not None and self.question_answer == self.match.correct_answer:
-            points += 1
-            self.question_point = 1
-        else:
-            self.question_point = 0
-        
+
+        from .scoring import tip_points
+
+        points, self.question_point = tip_points(
+            self.home_score_tip, self.away_score_tip, self.question_answer,
+            self.match.home_score, self.match.away_score, self.match.correct_answer,
+        )
         return points
     
     def __str__(self):
         return f"{self.user.username} - {self.match} - {self.home_score_tip}:{self.away_score_tip}"
+
+class TipSnapshot(models.Model):
+    # Tipy po uzamčení zápasu už se nemění - rozložení se spočítá jednou
+    match = models.OneToOneField(Match, on_delete=models.CASCADE, related_name='tip_snapshot')
+    created_at = models.DateTimeField(auto_now_add=True)
+    tip_count = models.IntegerField(default=0)
+    histogram = models.JSONField(default=list)  # [[domácí, hosté, počet], ...] od nejčastějšího
+    outcomes = models.JSONField(default=dict)  # {'home': n, 'draw': n, 'away': n}
+    answers = models.JSONField(default=dict)  # {'yes': n, 'no': n, 'none': n}
+    tips = models.JSONField(default=list)  # [[user_id, jméno, domácí, hosté, odpověď, body], ...]
+    
+    def __str__(self):
+        return f"Rozložení tipů - {self.match}"
+    
+    def tip_rows(self):
+        return [
+            {'user_id': user_id, 'username': username, 'home_score_tip': home, 'away_score_tip': away,
+             'question_answer': answer, 'points_earned': points}
+            for user_id, username, home, away, answer, points in self.tips
+        ]
+    
+    def histogram_rows(self):
+        return [
+            {'home': home, 'away': away, 'count': count, 'share': 100 * count / self.tip_count}
+            for home, away, count in self.histogram
+        ]
+    
+    def outcome_rows(self):
+        labels = [('home', 'Výhra domácích'), ('draw', 'Remíza'), ('away', 'Výhra hostí')]
+        return [self._share_row(label, self.outcomes.get(key, 0)) for key, label in labels]
+    
+    def answer_rows(self):
+        labels = [('yes', 'Ano'), ('no', 'Ne'), ('none', 'Nevyplněno')]
+        return [self._share_row(label, self.answers.get(key, 0)) for key, label in labels]
+    
+    def _share_row(self, label, count):
+        return {'label': label, 'count': count, 'share': 100 * count / self.tip_count if self.tip_count else 0}
+
+class Job(models.Model):
+    # Fronta úloh v databázi - zpracovává ji příkaz run_jobs, žádný broker není potřeba
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Ve frontě'),
+        (RUNNING, 'Běží'),
+        (DONE, 'Hotovo'),
+        (FAILED, 'Chyba'),
+    ]
+    
+    kind = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)  # úlohy se stejným klíčem neběží souběžně (např. "match:5")
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, null=True, blank=True)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.IntegerField(default=0)  # 0-100
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        constraints = [
+            # Nejvýš jedna čekající a jedna běžící úloha na klíč
+            models.UniqueConstraint(fields=['key'], condition=Q(status='queued'), name='job_one_queued_per_key'),
+            models.UniqueConstraint(fields=['key'], condition=Q(status='running'), name='job_one_running_per_key'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], condition=Q(status='queued'), name='job_queued_idx'),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.kind} ({self.get_status_display()})"
+    
+    @property
+    def is_active(self):
+        return self.status in (self.QUEUED, self.RUNNING)
+
+class StandingHistory(models.Model):
+    # Kumulativní body a pozice v sezóně po každém odehraném zápase
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='standing_history')
+    kickoff = models.DateTimeField()  # kopie Match.datetime - historie uživatele se čte bez joinu
+    points = models.IntegerField()
+    rank = models.IntegerField()  # hustá pozice podle bodů za tipy v sezóně
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'user'], name='history_unique_match_user'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'kickoff'], name='history_user_kickoff_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} po {self.match}: {self.rank}. ({self.points} bodů)"
+
+class ScoreCorrection(models.Model):
+    # Auditní záznam opravy výsledku: původní a nový výsledek a posun bodů uživatelů
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='corrections')
+    created_at = models.DateTimeField(auto_now_add=True)
+    old_result = models.JSONField(default=dict)
+    new_result = models.JSONField(default=dict)
+    tips_checked = models.IntegerField(default=0)  # tipy, kterým se body mohly změnit
+    tips_changed = models.IntegerField(default=0)
+    points_delta = models.IntegerField(default=0)  # součet změn bodů všech uživatelů
+    deltas = models.JSONField(default=dict)  # {user_id: změna bodů}
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Oprava {self.match} ({self.tips_changed} tipů, {self.points_delta:+d} bodů)"
@@ -0,0 +1,134 @@
+# PROJECTION
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Min, Q
+from django.utils import timezone
+
+from . import caching
+from .instrumentation import mark_rebuild
+from .models import (
+    LOCK_BEFORE_KICKOFF, Match, MatchTip, Team, TeamRanking, UserProfile, season_bounds, season_of,
+)
+from .scoring import MAX_TIP_POINTS, RANKING_POINTS_PER_TEAM
+
+PROJECTION_KEY = 'tipovani:projection'
+
+
+@dataclass
+class UserProjection:
+    points: int
+    max_points: int
+    best_rank: int
+    eliminated: bool
+
+
+@dataclass
+class Projection:
+    # Sloupce seřazené podle user_id, index převádí user_id na řádek
+    user_ids: array
+    points: array
+    max_points: array
+    best_ranks: array
+    eliminated: bytes
+    remaining: int
+    leader_points: int
+    valid_until: object
+
+    def for_user(self, user_id):
+        i = bisect_right(self.user_ids, user_id) - 1
+        if i < 0 or self.user_ids[i] != user_id:
+            return None
+        return UserProjection(
+            points=self.points[i],
+            max_points=self.max_points[i],
+            best_rank=self.best_ranks[i],
+            eliminated=bool(self.eliminated[i]),
+        )
+
+    @property
+    def alive(self):
+        return len(self.eliminated) - sum(self.eliminated)
+
+
+def build(now=None):
+    now = now or timezone.now()
+    lock_at = now + LOCK_BEFORE_KICKOFF
+    # Nedohrané zápasy minulých sezón už body nepřinesou
+    start, end = season_bounds(season_of(now))
+
+    remaining = Match.objects.in_season(season_of(now)).filter(is_finished=False).aggregate(
+        total=Count('id'),
+        open=Count('id', filter=Q(datetime__gt=lock_at)),
+        next_kickoff=Min('datetime', filter=Q(datetime__gt=lock_at)),
+    )
+    rows = list(UserProfile.objects.order_by('user_id').values_list('user_id', 'points'))
+    user_ids = array('i', (user_id for user_id, _ in rows))
+    points = array('i', (points for _, points in rows))
+    index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+    # Řádkové součty matice uživatel × zbývající zápas: otevřený zápas může dát
+    # každému maximum, uzamčený jen tomu, kdo ho tipnul (bez odpovědi o bod méně)
+    reachable = array('i', [remaining['open'] * MAX_TIP_POINTS]) * len(rows)
+    locked_tips = MatchTip.objects.filter(
+        match__is_finished=False, match__datetime__gte=start, match__datetime__lt=end,
+        match__datetime__lte=lock_at,
+    ).values_list('user_id', 'question_answer')
+    for user_id, answer in locked_tips.iterator(chunk_size=5000):
+        i = index.get(user_id)
+        if i is not None:
+            reachable[i] += MAX_TIP_POINTS - (answer is None)
+
+    # Dokud admin nezadal správné pořadí, může odeslaný tip pořadí ještě
+    # bodovat u každého seřazeného týmu
+    pending_rankings = (
+        TeamRanking.objects.filter(is_submitted=True)
+        .filter(~Exists(Team.objects.filter(position__isnull=False)))
+        .annotate(teams=Count('items'))
+        .values_list('user_id', 'teams')
+    )
+    for user_id, teams in pending_rankings:
+        i = index.get(user_id)
+        if i is not None:
+            reachable[i] += teams * RANKING_POINTS_PER_TEAM
+
+    max_points = array('i', map(int.__add__, points, reachable))
+
+    # Nejlepší pozice: uživatel získá maximum, ostatní už nic - husté pořadí
+    # je 1 + počet různých bodových hodnot ostatních nad jeho maximem
+    distinct = sorted(set(points))
+    best_ranks = array('i', (len(distinct) - bisect_right(distinct, best) + 1 for best in max_points))
+    leader_points = distinct[-1] if distinct else 0
+    eliminated = bytes(best < leader_points for best in max_points)
+
+    next_lock = remaining['next_kickoff'] - LOCK_BEFORE_KICKOFF if remaining['next_kickoff'] else None
+    return Projection(
+        user_ids=user_ids,
+        points=points,
+        max_points=max_points,
+        best_ranks=best_ranks,
+        eliminated=eliminated,
+        remaining=remaining['total'],
+        leader_points=leader_points,
+        valid_until=next_lock,
+    )
+
+
+def current(request=None):
+    # Platí do dalšího výsledku (verze bodování) nebo do uzamčení dalšího zápasu
+    version, _ = caching.scoring_version(request)
+    key = f'{PROJECTION_KEY}:v{version}'
+    projection = cache.get(key)
+    if projection is None or (projection.valid_until and timezone.now() >= projection.valid_until):
+        mark_rebuild()
+        projection = build()
+        cache.set(key, projection, caching.VERSIONED_TIMEOUT)
+    return projection
+
+
+def invalidate():
+    # Odeslané pořadí týmů mění maximum bodů, verzi bodování ale nezvyšuje
+    version, _ = caching.scoring_version()
+    cache.delete(f'{PROJECTION_KEY}:v{version}')
@@ -0,0 +1,61 @@
+# ROUTERS
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import Resolver404, resolve
+from django.utils.decorators import sync_and_async_middleware
+
+READ_ALIAS = 'read'
+
+# Nastaveno po dobu GET requestu na view jen pro čtení (přenáší se i do vláken async ORM)
+_read_only = ContextVar('tipovani_read_only', default=False)
+
+
+class ReadConnectionRouter:
+    # Čtecí view jdou přes samostatné spojení (PRAGMA query_only), takže je
+    # ve WAL režimu neblokují zápisy tipů a výsledků; zápisy vždy do default
+    def db_for_read(self, model, **hints):
+        if _read_only.get():
+            return READ_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def read_only(request):
+    if request.method not in ('GET', 'HEAD') or READ_ALIAS not in settings.DATABASES:
+        return False
+    try:
+        view_name = resolve(request.path_info).view_name
+    except Resolver404:
+        return False
+    return view_name in settings.READ_ONLY_VIEWS
+
+
+@sync_and_async_middleware
+def read_routing_middleware(get_response):
+    # Musí být před SessionMiddleware, aby se i session a uživatel četli přes čtecí spojení
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _read_only.set(read_only(request))
+            try:
+                return await get_response(request)
+            finally:
+                _read_only.reset(token)
+    else:
+        def middleware(request):
+            token = _read_only.set(read_only(request))
+            try:
+                return get_response(request)
+            finally:
+                _read_only.reset(token)
+    return middleware
@@ -0,0 +1,310 @@
+# SCORING
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from . import caching, events, history, snapshots, standings
+from .instrumentation import QueryCounter
+from .models import Match, MatchTip, ScoreCorrection, Team, TeamRanking, TeamRankingItem, UserProfile
+
+RANKING_POINTS_PER_TEAM = 3
+# Vítěz 2 + přesné skóre 2 + 2 + bonus 2 + otázka 1
+MAX_TIP_POINTS = 9
+UPDATE_BATCH = 500
+
+
+RESULT_FIELDS = ('is_finished', 'home_score', 'away_score', 'correct_answer')
+TIP_FIELDS = (
+    'id', 'user_id', 'home_score_tip', 'away_score_tip',
+    'question_answer', 'points_earned', 'question_point',
+)
+
+
+def outcome(home, away):
+    return (home > away) - (home < away)
+
+
+def tip_points(home_tip, away_tip, answer, home_score, away_score, correct_answer):
+    # Pravidla 2/2/2/2/+1 pro jeden tip; vrací (body celkem, bod za otázku)
+    exact_home = home_tip == home_score
+    exact_away = away_tip == away_score
+    question = int(answer is not None and answer == correct_answer)
+    points = (
+        2 * (outcome(home_tip, away_tip) == outcome(home_score, away_score))
+        + 2 * exact_home + 2 * exact_away + 2 * (exact_home and exact_away)
+        + question
+    )
+    return points, question
+
+
+def score_batch(home_tips, away_tips, answers, home_scores, away_scores, correct_answers):
+    # Stejně dlouhé sloupce tipů a výsledků; vrací sloupce (body celkem, body za otázku)
+    scored = list(map(tip_points, home_tips, away_tips, answers, home_scores, away_scores, correct_answers))
+    return [points for points, _ in scored], [question for _, question in scored]
+
+
+@dataclass
+class RankingResult:
+    rankings: int
+    points: int
+    changed: int
+    queries: int
+
+
+@dataclass
+class ScoringResult:
+    tips: int
+    changed: int
+    users: int
+    queries: int
+
+
+def refresh_profile_points(users):
+    # `users` je queryset uživatelů nebo seznam jejich id
+    missing = User.objects.filter(pk__in=users, userprofile__isnull=True).values_list('pk', flat=True)
+    UserProfile.objects.bulk_create(
+        [UserProfile(user_id=user_id) for user_id in missing],
+        ignore_conflicts=True,
+    )
+
+    profiles = UserProfile.objects.filter(user__in=users)
+    old_points = dict(profiles.values_list('user_id', 'points'))
+
+    tip_total = (
+        MatchTip.objects.filter(user=OuterRef('user'))
+        .values('user')
+        .annotate(total=Sum('points_earned'))
+        .values('total')
+    )
+    profiles.update(points=Coalesce(Subquery(tip_total), 0) + F('ranking_points'))
+
+    standings.apply_deltas(old_points, dict(profiles.values_list('user_id', 'points')))
+
+
+def _noop():
+    pass
+
+
+def _update_tips(tips, heartbeat):
+    # Po dávkách, aby dlouhý přepočet průběžně hlásil, že worker žije
+    for start in range(0, len(tips), UPDATE_BATCH):
+        MatchTip.objects.bulk_update(tips[start:start + UPDATE_BATCH], ['points_earned', 'question_point'])
+        heartbeat()
+
+
+def score_match(match, heartbeat=_noop):
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter), transaction.atomic():
+        tips = list(MatchTip.objects.filter(match=match).only(*TIP_FIELDS))
+
+        if match.is_finished:
+            count = len(tips)
+            points, question = score_batch(
+                [tip.home_score_tip for tip in tips],
+                [tip.away_score_tip for tip in tips],
+                [tip.question_answer for tip in tips],
+                [match.home_score] * count,
+                [match.away_score] * count,
+                [match.correct_answer] * count,
+            )
+        else:
+            points = question = [0] * len(tips)
+
+        changed = []
+        for tip, new_points, question_point in zip(tips, points, question):
+            if new_points != tip.points_earned or question_point != tip.question_point:
+                tip.points_earned = new_points
+                tip.question_point = question_point
+                changed.append(tip)
+
+        _update_tips(changed, heartbeat)
+        if changed:
+            snapshots.refresh_points(match, {tip.user_id: tip.points_earned for tip in changed})
+
+        refresh_profile_points(User.objects.filter(matchtip__match=match))
+        heartbeat()
+        history.record(match)
+        version = caching.bump_scoring_version(scored=True)
+        # Podle verze zápasu matice bodů pozná, které sloupce načíst znovu
+        Match.objects.filter(pk=match.pk).update(scoring_version=version)
+
+        result = ScoringResult(
+            tips=len(tips),
+            changed=len(changed),
+            users=len({tip.user_id for tip in tips}),
+            queries=counter.count,
+        )
+        events.match_scored(match, result, version)
+
+    return result
+
+
+def is_correction(match, old_result):
+    # Oprava = zápas byl vyhodnocený se skóre a zůstává vyhodnocený
+    return bool(
+        old_result and old_result.get('is_finished') and match.is_finished
+        and old_result.get('home_score') is not None and old_result.get('away_score') is not None
+    )
+
+
+def _outcome_q(result):
+    if result > 0:
+        return Q(home_score_tip__gt=F('away_score_tip'))
+    if result < 0:
+        return Q(home_score_tip__lt=F('away_score_tip'))
+    return Q(home_score_tip=F('away_score_tip'))
+
+
+def correction_conditions(match, old_result):
+    # Tipy, kterým se mohou změnit body: body za vítěze jen u tipů se starým
+    # nebo novým výsledkem zápasu, za přesné skóre (a bonus) jen u tipů se
+    # starou nebo novou hodnotou změněné složky, za otázku jen u odpovědí
+    old_home, old_away = old_result['home_score'], old_result['away_score']
+    conditions = []
+    old_outcome = outcome(old_home, old_away)
+    new_outcome = outcome(match.home_score, match.away_score)
+    if old_outcome != new_outcome:
+        conditions += [_outcome_q(old_outcome), _outcome_q(new_outcome)]
+    if old_home != match.home_score:
+        conditions.append(Q(home_score_tip__in=[old_home, match.home_score]))
+    if old_away != match.away_score:
+        conditions.append(Q(away_score_tip__in=[old_away, match.away_score]))
+    if old_result.get('correct_answer') != match.correct_answer:
+        conditions.append(Q(question_answer__isnull=False))
+    return conditions
+
+
+def correct_match(match, old_result, heartbeat=_noop):
+    # Přepočet po opravě výsledku: čte a zapisuje jen tipy, kterým se body
+    # mohou změnit, a součty uživatelů posune o rozdíl - bez přepočtu celé historie
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter), transaction.atomic():
+        conditions = correction_conditions(match, old_result)
+        tips = list(
+            MatchTip.objects.filter(match=match).filter(reduce(or_, conditions)).only(*TIP_FIELDS)
+        ) if conditions else []
+
+        count = len(tips)
+        points, question = score_batch(
+            [tip.home_score_tip for tip in tips],
+            [tip.away_score_tip for tip in tips],
+            [tip.question_answer for tip in tips],
+            [match.home_score] * count,
+            [match.away_score] * count,
+            [match.correct_answer] * count,
+        )
+
+        changed = []
+        deltas = defaultdict(int)
+        for tip, new_points, question_point in zip(tips, points, question):
+            if new_points != tip.points_earned or question_point != tip.question_point:
+                deltas[tip.user_id] += new_points - tip.points_earned
+                tip.points_earned = new_points
+                tip.question_point = question_point
+                changed.append(tip)
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+
+        _update_tips(changed, heartbeat)
+        if changed:
+            snapshots.refresh_points(match, {tip.user_id: tip.points_earned for tip in changed})
+
+        if deltas:
+            old_points = dict(
+                UserProfile.objects.filter(user_id__in=list(deltas)).values_list('user_id', 'points')
+            )
+            missing = set(deltas) - set(old_points)
+            if missing:
+                # Uživatel bez profilu - spočítat celý součet
+                refresh_profile_points(list(missing))
+
+            by_delta = defaultdict(list)
+            for user_id in old_points:
+                by_delta[deltas[user_id]].append(user_id)
+            for delta, user_ids in by_delta.items():
+                UserProfile.objects.filter(user_id__in=user_ids).update(points=F('points') + delta)
+
+            standings.apply_deltas(old_points, {
+                user_id: points + deltas[user_id] for user_id, points in old_points.items()
+            })
+            heartbeat()
+            history.record(match)
+
+        ScoreCorrection.objects.create(
+            match=match,
+            old_result={field: old_result.get(field) for field in RESULT_FIELDS},
+            new_result={field: getattr(match, field) for field in RESULT_FIELDS},
+            tips_checked=len(tips),
+            tips_changed=len(changed),
+            points_delta=sum(deltas.values()),
+            deltas={str(user_id): delta for user_id, delta in deltas.items()},
+        )
+        version = caching.bump_scoring_version(scored=True)
+        # Podle verze zápasu matice bodů pozná, které sloupce načíst znovu
+        Match.objects.filter(pk=match.pk).update(scoring_version=version)
+
+        result = ScoringResult(
+            tips=len(tips),
+            changed=len(changed),
+            users=len(deltas),
+            queries=counter.count,
+        )
+        events.match_scored(match, result, version)
+
+    return result
+
+
+def evaluate_rankings(positions, heartbeat=_noop):
+    # positions: {team_id: správná pozice}; opakované vyhodnocení body nahradí
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter), transaction.atomic():
+        Team.objects.bulk_update(
+            [Team(id=team_id, position=position) for team_id, position in positions.items()],
+            ['position'],
+        )
+
+        # Jeden dotaz: položky ⋈ týmy na shodné pozici
+        hits = dict(
+            TeamRankingItem.objects.filter(ranking__is_submitted=True, position=F('team__position'))
+            .values_list('ranking__user_id')
+            .annotate(hits=Count('id'))
+        )
+
+        submitted = User.objects.filter(teamranking__is_submitted=True)
+        missing = submitted.filter(userprofile__isnull=True).values_list('pk', flat=True)
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id) for user_id in missing],
+            ignore_conflicts=True,
+        )
+
+        changed = []
+        for profile in UserProfile.objects.filter(
+            Q(user__in=submitted) | Q(ranking_points__gt=0)
+        ).only('id', 'user_id', 'ranking_points'):
+            ranking_points = hits.get(profile.user_id, 0) * RANKING_POINTS_PER_TEAM
+            if ranking_points != profile.ranking_points:
+                profile.ranking_points = ranking_points
+                changed.append(profile)
+
+        UserProfile.objects.bulk_update(changed, ['ranking_points'], batch_size=UPDATE_BATCH)
+        heartbeat()
+        if changed:
+            refresh_profile_points([profile.user_id for profile in changed])
+
+        rankings = TeamRanking.objects.filter(is_submitted=True).count()
+        version = caching.bump_scoring_version(scored=True)
+
+        result = RankingResult(
+            rankings=rankings,
+            points=sum(hits.values()) * RANKING_POINTS_PER_TEAM,
+            changed=len(changed),
+            queries=counter.count,
+        )
+        events.rankings_evaluated(result, version)
+
+    return result
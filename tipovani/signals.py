@@ -0,0 +1,35 @@
+# SIGNALS
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import caching, standings
+from .auth import invalidate_user
+from .models import Team, TeamRanking, TeamRankingItem, UserProfile
+
+
+@receiver(post_save, sender=UserProfile)
+def add_to_standings(sender, instance, created, **kwargs):
+    # Nový hráč se hned objeví v tabulce pořadí
+    if created:
+        standings.add_profile(instance)
+        caching.bump_scoring_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Změna hesla, práv nebo last_login se musí projevit i v cache přihlášení
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=TeamRanking)
+@receiver(post_delete, sender=TeamRanking)
+@receiver(post_save, sender=TeamRankingItem)
+@receiver(post_delete, sender=TeamRankingItem)
+def invalidate_submitted_rankings(sender, **kwargs):
+    # Stránka pořadí se skládá z týmů, tipů pořadí i jejich položek (i z adminu)
+    transaction.on_commit(caching.invalidate_rankings)
@@ -0,0 +1,62 @@
+# SNAPSHOTS
+from collections import Counter
+
+from .instrumentation import mark_rebuild
+from .models import Match, MatchTip, TipSnapshot
+
+OUTCOMES = {1: 'home', 0: 'draw', -1: 'away'}
+
+
+def build(match):
+    tips = list(
+        MatchTip.objects.filter(match=match).order_by('user__username').values_list(
+            'user_id', 'user__username', 'home_score_tip', 'away_score_tip', 'question_answer', 'points_earned',
+        )
+    )
+    scores = Counter((home, away) for _, _, home, away, _, _ in tips)
+    outcomes = Counter(OUTCOMES[(home > away) - (home < away)] for _, _, home, away, _, _ in tips)
+    answers = Counter(
+        'none' if answer is None else 'yes' if answer else 'no' for _, _, _, _, answer, _ in tips
+    )
+
+    return TipSnapshot(
+        match=match,
+        tip_count=len(tips),
+        histogram=[[home, away, count] for (home, away), count in scores.most_common()],
+        outcomes={key: outcomes[key] for key in OUTCOMES.values()},
+        answers={key: answers[key] for key in ('yes', 'no', 'none')},
+        tips=[list(tip) for tip in tips],
+    )
+
+
+def for_match(match):
+    # Volat jen pro uzamčený zápas; souběžné první požadavky vloží řádek jen jednou
+    snapshot = TipSnapshot.objects.filter(match=match).first()
+    if snapshot is None:
+        # Při souběhu vyhraje první zápis; obsah je stejný, protože tipy jsou zamčené
+        mark_rebuild()
+        snapshot = build(match)
+        TipSnapshot.objects.bulk_create([snapshot], ignore_conflicts=True)
+    return snapshot
+
+
+def refresh_points(match, points_by_user):
+    refresh_points_many({match.pk: points_by_user})
+
+
+def refresh_points_many(points_by_match):
+    # {match_id: {user_id: body}}; tipy jsou zmražené, po vyhodnocení se mění jen sloupec bodů
+    snapshots = list(TipSnapshot.objects.filter(match_id__in=list(points_by_match)))
+    for snapshot in snapshots:
+        points_by_user = points_by_match[snapshot.match_id]
+        for row in snapshot.tips:
+            row[5] = points_by_user.get(row[0], row[5])
+    TipSnapshot.objects.bulk_update(snapshots, ['tips'], batch_size=100)
+
+
+def freeze_locked(now=None):
+    # Pro pravidelné spouštění - snímek je hotový dřív, než stránku otevřou všichni najednou
+    matches = Match.objects.with_lock_state(now).filter(locked=True, tip_snapshot__isnull=True)
+    created = [build(match) for match in matches]
+    TipSnapshot.objects.bulk_create(created, ignore_conflicts=True)
+    return len(created)
@@ -0,0 +1,134 @@
+# STANDINGS
+from collections import defaultdict
+
+from django.db.models import F, Q
+
+from .models import Standing, UserProfile
+
+PAGE_SIZE = 50
+
+
+def dense_ranks(points_desc):
+    # Pro body seřazené sestupně vrací odpovídající husté pozice
+    ranks = []
+    rank = 0
+    last = None
+    for points in points_desc:
+        if points != last:
+            rank += 1
+            last = points
+        ranks.append(rank)
+    return ranks
+
+
+def rerank(new_users=()):
+    rows = list(
+        Standing.objects.order_by('-points').values_list('id', 'user_id', 'points', 'rank', 'previous_rank')
+    )
+    ranks = dense_ranks([points for _, _, points, _, _ in rows])
+
+    changed = []
+    for (pk, user_id, points, old_rank, previous_rank), rank in zip(rows, ranks):
+        # Předchozí pozice = pozice před posledním přepočtem
+        if user_id in new_users:
+            changed.append(Standing(id=pk, rank=rank, previous_rank=None))
+        elif rank != old_rank or previous_rank != old_rank:
+            changed.append(Standing(id=pk, rank=rank, previous_rank=old_rank))
+    Standing.objects.bulk_update(changed, ['rank', 'previous_rank'], batch_size=500)
+
+
+def apply_deltas(old_points, new_points):
+    # old_points / new_points: {user_id: body} před a po přepočtu
+    missing = set(old_points) - set(
+        Standing.objects.filter(user_id__in=list(old_points)).values_list('user_id', flat=True)
+    )
+    Standing.objects.bulk_create(
+        [Standing(user_id=user_id, points=old_points[user_id]) for user_id in missing],
+        ignore_conflicts=True,
+    )
+
+    by_delta = defaultdict(list)
+    for user_id, points in new_points.items():
+        delta = points - old_points.get(user_id, 0)
+        if delta:
+            by_delta[delta].append(user_id)
+
+    for delta, user_ids in by_delta.items():
+        Standing.objects.filter(user_id__in=user_ids).update(points=F('points') + delta)
+
+    if by_delta or missing:
+        rerank(new_users=missing)
+
+
+def add_profile(profile):
+    rank = Standing.objects.filter(points__gt=profile.points).values('points').distinct().count() + 1
+    Standing.objects.get_or_create(user_id=profile.user_id, defaults={
+        'points': profile.points,
+        'rank': rank,
+    })
+
+
+def rebuild():
+    Standing.objects.exclude(user__in=UserProfile.objects.values('user')).delete()
+    current = dict(Standing.objects.values_list('user_id', 'points'))
+    profiles = dict(UserProfile.objects.values_list('user_id', 'points'))
+    apply_deltas({user_id: current.get(user_id, 0) for user_id in profiles}, profiles)
+
+
+def parse_cursor(value):
+    # Kurzor "body:user_id" posledního řádku předchozí stránky
+    try:
+        points, user_id = value.split(':')
+        return int(points), int(user_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _ordered():
+    return Standing.objects.select_related('user', 'user__teamranking').order_by('-points', 'user_id')
+
+
+def page_query(after=None, size=PAGE_SIZE):
+    # Jedna stránka navíc o řádek - podle něj se pozná, zda existuje další
+    standings = _ordered()
+    if after is not None:
+        points, user_id = after
+        standings = standings.filter(Q(points__lt=points) | Q(points=points, user_id__gt=user_id))
+    return standings[:size + 1]
+
+
+def split_page(rows, size=PAGE_SIZE):
+    next_cursor = None
+    if len(rows) > size:
+        last = rows[size - 1]
+        next_cursor = f'{last.points}:{last.user_id}'
+    return rows[:size], next_cursor
+
+
+def page(after=None, size=PAGE_SIZE):
+    return split_page(list(page_query(after, size)), size)
+
+
+def position(user):
+    return _ordered().filter(user=user).first()
+
+
+def around(standing, radius=2):
+    # Okolí uživatele v tabulce - čte jen 2 * radius řádků přes index
+    before = list(
+        _ordered()
+        .filter(Q(points__gt=standing.points) | Q(points=standing.points, user_id__lt=standing.user_id))
+        .order_by('points', '-user_id')[:radius]
+    )
+    after = list(
+        _ordered().filter(
+            Q(points__lt=standing.points) | Q(points=standing.points, user_id__gt=standing.user_id)
+        )[:radius]
+    )
+    return before[::-1] + [standing] + after
+
+
+def with_neighbours(user):
+    # (pozice uživatele, jeho okolí) - cachuje se jako celek do další verze bodování
+    standing = position(user)
+    return standing, around(standing) if standing else []
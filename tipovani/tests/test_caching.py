@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tipovani import auth, caching
+from tipovani.models import Team, TeamRanking, TeamRankingItem
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'caching-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'caching-shared'},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SubmittedRankingsCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.team = Team.objects.create(name='Tým A')
+        user = User.objects.create_user('hrac', password='x')
+        cls.ranking = TeamRanking.objects.create(user=user, is_submitted=True)
+        cls.item = TeamRankingItem.objects.create(ranking=cls.ranking, team=cls.team, position=1)
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def teams(self):
+        return [item['team'] for item in caching.submitted_rankings()['cards'][0]['items']]
+
+    def test_team_rename_invalidates(self):
+        self.assertEqual(self.teams(), ['Tým A'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.team.name = 'Tým B'
+            self.team.save()
+        self.assertEqual(self.teams(), ['Tým B'])
+
+    def test_item_delete_invalidates(self):
+        self.assertEqual(self.teams(), ['Tým A'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.assertEqual(self.teams(), [])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CachedModelBackendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hrac', password='x')
+
+    def setUp(self):
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+
+    def test_user_stays_out_of_shared_cache(self):
+        backend = auth.CachedModelBackend()
+        self.assertEqual(backend.get_user(self.user.pk), self.user)
+        self.assertIsNone(caches['shared'].get(auth.user_key(self.user.pk)))
+        self.assertIsNotNone(caches['default'].get(auth.user_key(self.user.pk)))
+
+    def test_save_invalidates(self):
+        backend = auth.CachedModelBackend()
+        backend.get_user(self.user.pk)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(backend.get_user(self.user.pk))
+
+    def test_session_from_model_backend_stays_valid(self):
+        # Session z doby před CachedModelBackend nese cestu k ModelBackend
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('zapasy'))
+        self.assertEqual(response.wsgi_request.user, self.user)
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tipovani import caching, events
+from tipovani.models import Match
+
+
+class LiveEventsPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hrac', password='x')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    @override_settings(SSE_ENABLED=False)
+    def test_no_event_source_without_sse(self):
+        response = self.client.get(reverse('zapasy'))
+        self.assertNotContains(response, 'EventSource(')
+
+    @override_settings(SSE_ENABLED=True)
+    def test_event_source_with_sse(self):
+        response = self.client.get(reverse('zapasy'))
+        self.assertContains(response, 'EventSource(')
+
+    @override_settings(SSE_ENABLED=False)
+    def test_stream_disabled(self):
+        response = self.client.get(reverse('api:events'))
+        self.assertEqual(response.status_code, 501)
+
+
+class RecordingLocalBroadcast(events.LocalBroadcast):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish(self, event, data):
+        self.published.append(event)
+        super().publish(event, data)
+
+
+class PollerTests(TestCase):
+    def setUp(self):
+        self.broadcast = RecordingLocalBroadcast()
+
+    async def test_version_bump_without_scoring_is_silent(self):
+        await self.broadcast.check_database()
+        await User.objects.acreate(username='novy')
+        await Match.objects.acreate(opponent='A', datetime=timezone.now() - timedelta(days=1), location='L')
+        await self.broadcast.check_database()
+        self.assertEqual(self.broadcast.published, [])
+
+    async def test_scoring_change_is_published(self):
+        await self.broadcast.check_database()
+        match = await Match.objects.acreate(
+            opponent='A', datetime=timezone.now() - timedelta(days=1), location='L',
+            home_score=2, away_score=1, is_finished=True,
+        )
+        await sync_to_async(caching.bump_scoring_version)(scored=True)
+        await self.broadcast.check_database()
+        self.assertEqual(
+            self.broadcast.published,
+            [events.MATCH_FINISHED, events.POINTS_UPDATED, events.STANDINGS_CHANGED],
+        )
+        self.assertIn(match.pk, self.broadcast.finished)
+
+    @override_settings(EVENTS_POLL_INTERVAL=0)
+    async def test_poller_survives_errors(self):
+        self.broadcast.subscribers = {object()}
+        calls = []
+
+        async def check_database():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('databáze nedostupná')
+            self.broadcast.subscribers = set()
+
+        with mock.patch.object(self.broadcast, 'check_database', check_database), \
+                self.assertLogs('tipovani.events', 'ERROR'):
+            await self.broadcast.poll()
+        self.assertEqual(len(calls), 2)
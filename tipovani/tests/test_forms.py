@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tipovani.forms import TeamCorrectRankingForm, TeamRankingForm
+from tipovani.models import Job, Match, Team
+
+
+class TeamRankingFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teams = [Team.objects.create(name=f'Tým {i}') for i in range(3)]
+
+    def test_positions_limited_by_team_count(self):
+        for form_class in (TeamRankingForm, TeamCorrectRankingForm):
+            data = {f'team_{team.pk}': position for position, team in enumerate(self.teams, start=1)}
+            self.assertTrue(form_class(data).is_valid())
+            data[f'team_{self.teams[0].pk}'] = len(self.teams) + 1
+            form = form_class(data)
+            self.assertFalse(form.is_valid())
+            self.assertIn(f'team_{self.teams[0].pk}', form.errors)
+
+
+@override_settings(JOBS_EAGER=False)
+class MatchResultFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username='admin', is_staff=True)
+        cls.match = Match.objects.create(opponent='A', datetime=timezone.now() - timedelta(hours=3), location='L')
+
+    def test_blank_score_is_rejected(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse('zadat_vysledek', args=[self.match.pk]),
+            {'home_score': '3', 'away_score': '', 'correct_answer': 'True'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors['away_score'])
+        self.match.refresh_from_db()
+        self.assertFalse(self.match.is_finished)
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tipovani.models import Match
+
+
+class MatchCardFragmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('hrac', password='x')
+        cls.match = Match.objects.create(
+            opponent='Soupeř', datetime=timezone.now() + timedelta(days=2), location='Hala', question='Padne gól?',
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_card_follows_match_edits(self):
+        self.assertContains(self.client.get(reverse('zapasy')), 'Padne gól?')
+        # Úprava mimo bodování verzi nezvýší - kartu musí obnovit samotný klíč
+        Match.objects.filter(pk=self.match.pk).update(
+            question='Vyhraje domácí?', opponent='Nový soupeř', location='Jiná hala', home_team='Domácí B',
+        )
+        response = self.client.get(reverse('zapasy'))
+        for text in ('Vyhraje domácí?', 'Nový soupeř', 'Jiná hala', 'Domácí B'):
+            self.assertContains(response, text)
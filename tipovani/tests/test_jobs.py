@@ -0,0 +1,86 @@
+import logging
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tipovani import jobs
+from tipovani.models import Job, Match
+
+
+@override_settings(JOBS_EAGER=False)
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.match = Match.objects.create(
+            opponent='A', datetime=timezone.now() - timedelta(days=1), location='L',
+            home_score=2, away_score=1, correct_answer=True, is_finished=True,
+        )
+
+    def setUp(self):
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def enqueue(self):
+        return jobs.score_match_later(self.match, {'is_finished': False})
+
+    def make_stale(self, job):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - jobs.STALE_AFTER - timedelta(seconds=1))
+
+    def test_enqueue_merges_waiting_job(self):
+        first = self.enqueue()
+        second = jobs.score_match_later(self.match, {'is_finished': True})
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Job.objects.get(pk=first.pk).payload, {'old_result': {'is_finished': False}})
+
+    def test_claim_takes_job_once(self):
+        job = self.enqueue()
+        claimed = jobs.claim('a')
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual((claimed.status, claimed.worker), (Job.RUNNING, 'a'))
+        self.assertIsNone(jobs.claim('b'))
+
+    def test_running_key_blocks_next_job(self):
+        self.enqueue()
+        jobs.claim('a')
+        self.enqueue()
+        # Druhá úloha pro stejný zápas čeká, dokud první neskončí
+        self.assertIsNone(jobs.claim('b'))
+
+    def test_fresh_heartbeat_is_not_requeued(self):
+        self.enqueue()
+        job = jobs.claim('a')
+        jobs.heartbeat(job)
+        jobs.requeue_stale()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+    def test_stale_job_is_requeued_and_old_owner_cannot_finish(self):
+        self.enqueue()
+        job = jobs.claim('a')
+        self.make_stale(job)
+        taken = jobs.claim('b')
+        self.assertEqual((taken.pk, taken.worker), (job.pk, 'b'))
+
+        # Původní worker se probral - stav úlohy už nepřepíše
+        self.assertFalse(jobs.run(job))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+        self.assertTrue(jobs.run(taken))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.DONE)
+
+    def test_stale_job_with_waiting_duplicate_fails(self):
+        self.enqueue()
+        job = jobs.claim('a')
+        waiting = self.enqueue()
+        self.make_stale(job)
+        jobs.requeue_stale()
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.FAILED)
+        self.assertEqual(Job.objects.get(pk=waiting.pk).status, Job.QUEUED)
+
+    def test_previous_success_required_for_correction(self):
+        self.enqueue()
+        first = jobs.claim('a')
+        self.assertFalse(jobs._previous_succeeded(first))
+        jobs.run(first)
+        self.enqueue()
+        second = jobs.claim('a')
+        self.assertTrue(jobs._previous_succeeded(second))
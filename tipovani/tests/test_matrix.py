@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from tipovani import caching, matrix, scoring
+from tipovani.models import Match, MatchTip
+
+
+class PointsMatrixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user, cls.other = User.objects.create(username='hrac'), User.objects.create(username='souper')
+        cls.scored = Match.objects.create(
+            opponent='A', datetime=now - timedelta(days=2), location='L',
+            home_score=2, away_score=1, correct_answer=True, is_finished=True,
+        )
+        # Dokončený zápas bez skóre (např. uložený přes Django admin)
+        cls.blank = Match.objects.create(opponent='B', datetime=now - timedelta(days=1), location='L', is_finished=True)
+        for user in (cls.user, cls.other):
+            for match in (cls.scored, cls.blank):
+                MatchTip.objects.create(user=user, match=match, home_score_tip=2, away_score_tip=1)
+        scoring.score_match(cls.scored)
+
+    def setUp(self):
+        matrix._matrix = None
+        self.addCleanup(setattr, matrix, '_matrix', None)
+
+    def test_finished_match_without_score_is_skipped(self):
+        points = matrix.PointsMatrix().refreshed(caching.bump_scoring_version())
+        self.assertEqual(list(points.columns), [self.scored.pk])
+        self.assertEqual(points.stats(self.user.pk).points, 8)
+
+    def test_pages_render_with_blank_finished_match(self):
+        caching.bump_scoring_version()
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('dashboard')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('porovnani', args=[self.other.pk])).status_code, 200)
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from tipovani import projection, scoring
+from tipovani.models import Match, Team, TeamRanking, TeamRankingItem, UserProfile, season_bounds, season_of
+from tipovani.scoring import MAX_TIP_POINTS, RANKING_POINTS_PER_TEAM
+
+
+class ProjectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.now = timezone.now()
+        cls.ranked = User.objects.create_user('s_poradim', password='x')
+        cls.unranked = User.objects.create_user('bez_poradi', password='x')
+        for user in (cls.ranked, cls.unranked):
+            UserProfile.objects.get_or_create(user=user)
+        Match.objects.create(opponent='A', datetime=cls.now + timedelta(days=2), location='L')
+        # Nedohraný zápas z minulé sezóny se do zbývajících nepočítá
+        previous_start, _ = season_bounds(season_of(cls.now) - 1)
+        Match.objects.create(opponent='B', datetime=previous_start + timedelta(days=30), location='L')
+
+        cls.teams = [Team.objects.create(name=f'Tým {i}') for i in range(4)]
+        ranking = TeamRanking.objects.create(user=cls.ranked, is_submitted=True, submitted_at=cls.now)
+        for position, team in enumerate(cls.teams, start=1):
+            TeamRankingItem.objects.create(ranking=ranking, team=team, position=position)
+
+    def test_only_current_season_counts(self):
+        result = projection.build(self.now)
+        self.assertEqual(result.remaining, 1)
+        self.assertEqual(result.for_user(self.unranked.pk).max_points, MAX_TIP_POINTS)
+
+    def test_pending_ranking_points(self):
+        result = projection.build(self.now)
+        self.assertEqual(
+            result.for_user(self.ranked.pk).max_points,
+            MAX_TIP_POINTS + len(self.teams) * RANKING_POINTS_PER_TEAM,
+        )
+
+    def test_evaluated_ranking_points_are_final(self):
+        scoring.evaluate_rankings({team.pk: position for position, team in enumerate(self.teams, start=1)})
+        result = projection.build(self.now)
+        ranked = result.for_user(self.ranked.pk)
+        self.assertEqual(ranked.points, len(self.teams) * RANKING_POINTS_PER_TEAM)
+        self.assertEqual(ranked.max_points, ranked.points + MAX_TIP_POINTS)
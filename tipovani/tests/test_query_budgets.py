@@ -0,0 +1,107 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tipovani import caching, matrix, scoring
+from tipovani.instrumentation import QueryBudgetExceeded
+from tipovani.models import Match, MatchTip, Team, TeamRanking, TeamRankingItem, TipSnapshot
+
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'budgets-default'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'budgets-shared'},
+}
+
+
+@override_settings(QUERY_BUDGET_STRICT=True, CACHES=TEST_CACHES, JOBS_EAGER=False)
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = [User.objects.create_user(f'hrac{i}', password='x') for i in range(5)]
+        cls.finished = Match.objects.create(
+            opponent='A', datetime=now - timedelta(days=3), location='L', question='Q?',
+            home_score=3, away_score=1, correct_answer=True, is_finished=True,
+        )
+        cls.locked = Match.objects.create(opponent='B', datetime=now - timedelta(minutes=10), location='L', question='Q?')
+        cls.upcoming = Match.objects.create(opponent='C', datetime=now + timedelta(days=3), location='L', question='Q?')
+        for i, user in enumerate(cls.users):
+            for match in (cls.finished, cls.locked, cls.upcoming):
+                MatchTip.objects.create(user=user, match=match, home_score_tip=i % 4, away_score_tip=1, question_answer=i % 2 == 0)
+        scoring.score_match(cls.finished)
+
+        teams = [Team.objects.create(name=f'Tým {i}') for i in range(3)]
+        for user in cls.users[:3]:
+            ranking = TeamRanking.objects.create(user=user, is_submitted=True, submitted_at=now)
+            for position, team in enumerate(teams, start=1):
+                TeamRankingItem.objects.create(ranking=ranking, team=team, position=position)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Rozpočty hlídá strict režim, logy jednotlivých requestů jsou tu jen šum
+        cls.request_logger = logging.getLogger('tipovani.requests')
+        cls.log_level = cls.request_logger.level
+        cls.request_logger.setLevel(logging.CRITICAL)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.request_logger.setLevel(cls.log_level)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(self.users[0])
+
+    def clear(self):
+        # Stav jako po startu procesu: prázdné cache, matice i snímky tipů
+        for alias in TEST_CACHES:
+            caches[alias].clear()
+        matrix._matrix = None
+        TipSnapshot.objects.all().delete()
+        self.client.force_login(self.users[0])
+
+    def budgeted_urls(self):
+        kwargs = {
+            'tipovani_k_zapasu': {'match_id': self.locked.pk},
+            'api:match_tips': {'match_id': self.locked.pk},
+            'porovnani': {'user_id': self.users[1].pk},
+        }
+        for name in settings.QUERY_BUDGETS:
+            yield name, reverse(name, kwargs=kwargs.get(name))
+
+    def get(self, name, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, name)
+
+    def test_first_visit_within_budget(self):
+        for name, url in self.budgeted_urls():
+            self.clear()
+            with self.subTest(view=name):
+                self.get(name, url)
+
+    def test_after_scoring_version_bump_within_budget(self):
+        self.clear()
+        for name, url in self.budgeted_urls():
+            self.get(name, url)
+        caching.bump_scoring_version()
+        for name, url in self.budgeted_urls():
+            with self.subTest(view=name):
+                self.get(name, url)
+
+    def test_warm_within_budget(self):
+        self.clear()
+        for name, url in self.budgeted_urls():
+            self.get(name, url)
+        for name, url in self.budgeted_urls():
+            with self.subTest(view=name):
+                self.get(name, url)
+
+    def test_strict_mode_raises(self):
+        with override_settings(QUERY_BUDGETS={'leaderboard': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse('leaderboard'))
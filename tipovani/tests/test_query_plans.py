@@ -0,0 +1,22 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from tipovani.management.commands.explain_hot_queries import hot_queries
+
+# "SCAN tabulka" bez indexu = průchod celou tabulkou
+FULL_SCAN = re.compile(r'\bSCAN \w+$', re.MULTILINE)
+
+
+class HotQueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, queryset, index in hot_queries():
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertIn(index, plan)
+                self.assertIsNone(FULL_SCAN.search(plan), plan)
+
+    def test_check_command_passes(self):
+        call_command('explain_hot_queries', '--check', stdout=StringIO())
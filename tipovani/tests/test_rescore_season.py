@@ -0,0 +1,41 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from tipovani import snapshots
+from tipovani.models import Match, MatchTip, TipSnapshot
+
+
+class RescoreSeasonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.matches = [
+            Match.objects.create(
+                opponent=f'Soupeř {i}', datetime=now - timedelta(days=i + 1), location='L',
+                home_score=i, away_score=1, correct_answer=True, is_finished=True,
+            )
+            for i in range(3)
+        ]
+        for i in range(4):
+            user = User.objects.create(username=f'hrac{i}')
+            for match in cls.matches:
+                MatchTip.objects.create(
+                    user=user, match=match, home_score_tip=i, away_score_tip=1, question_answer=i % 2 == 0,
+                )
+
+    def test_snapshots_follow_rescored_points(self):
+        # Tipy zatím bez bodů (jako podle starých pravidel), snímky je převezmou
+        for match in self.matches:
+            snapshots.for_match(match)
+        call_command('rescore_season', stdout=StringIO())
+
+        self.assertEqual(TipSnapshot.objects.count(), len(self.matches))
+        self.assertTrue(MatchTip.objects.filter(points_earned__gt=0).exists())
+        for snapshot in TipSnapshot.objects.all():
+            stored = dict(MatchTip.objects.filter(match_id=snapshot.match_id).values_list('user_id', 'points_earned'))
+            self.assertEqual({row[0]: row[5] for row in snapshot.tips}, stored)
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from itertools import product
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from tipovani import scoring
+from tipovani.models import Match, MatchTip, UserProfile
+from tipovani.scoring import MAX_TIP_POINTS, RESULT_FIELDS, score_batch, tip_points
+
+SCORES = range(3)
+ANSWERS = (None, True, False)
+# Změny jen domácího nebo hostujícího skóre, s i bez změny vítěze, a otázky
+RESULTS = [
+    (home, away, answer)
+    for (home, away), answer in product([(1, 0), (2, 0), (2, 2), (0, 1)], (True, False))
+]
+
+
+class TipPointsTests(TestCase):
+    def test_rules(self):
+        cases = [
+            # (tip, odpověď, výsledek, správná odpověď) -> (body, bod za otázku)
+            ((3, 1), True, (3, 1), True, (MAX_TIP_POINTS, 1)),
+            ((3, 1), None, (3, 1), True, (8, 0)),
+            ((2, 2), False, (2, 2), False, (9, 1)),
+            ((2, 1), None, (3, 1), None, (4, 0)),  # vítěz + domácí skóre
+            ((1, 0), None, (3, 0), None, (4, 0)),  # vítěz + hostující skóre
+            ((1, 1), None, (2, 2), None, (2, 0)),  # jen remíza
+            ((0, 1), None, (3, 1), None, (2, 0)),  # jen hostující skóre
+            ((0, 2), True, (3, 1), False, (0, 0)),
+            ((0, 2), True, (3, 1), True, (1, 1)),
+        ]
+        for (home_tip, away_tip), answer, (home, away), correct, expected in cases:
+            with self.subTest(tip=(home_tip, away_tip), result=(home, away)):
+                self.assertEqual(tip_points(home_tip, away_tip, answer, home, away, correct), expected)
+
+    def test_batch_matches_single_tip(self):
+        tips = list(product(SCORES, SCORES, ANSWERS))
+        for home, away, correct in RESULTS:
+            points, question = score_batch(
+                [tip[0] for tip in tips], [tip[1] for tip in tips], [tip[2] for tip in tips],
+                [home] * len(tips), [away] * len(tips), [correct] * len(tips),
+            )
+            self.assertEqual(
+                list(zip(points, question)),
+                [tip_points(*tip, home, away, correct) for tip in tips],
+            )
+
+
+class CorrectMatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.match = Match.objects.create(
+            opponent='A', datetime=timezone.now() - timedelta(days=1), location='L', question='Q?',
+        )
+        # Jeden hráč na každou kombinaci tipu a odpovědi
+        for i, (home, away, answer) in enumerate(product(SCORES, SCORES, ANSWERS)):
+            user = User.objects.create(username=f'hrac{i}')
+            MatchTip.objects.create(
+                user=user, match=cls.match, home_score_tip=home, away_score_tip=away, question_answer=answer,
+            )
+
+    def set_result(self, result):
+        home, away, correct = result
+        Match.objects.filter(pk=self.match.pk).update(
+            is_finished=True, home_score=home, away_score=away, correct_answer=correct,
+        )
+        self.match.refresh_from_db()
+        return {field: getattr(self.match, field) for field in RESULT_FIELDS}
+
+    def points(self):
+        return (
+            dict(MatchTip.objects.values_list('id', 'points_earned')),
+            dict(MatchTip.objects.values_list('id', 'question_point')),
+            dict(UserProfile.objects.values_list('user_id', 'points')),
+        )
+
+    def test_correction_equals_full_rescore(self):
+        for old, new in product(RESULTS, RESULTS):
+            if old == new:
+                continue
+            with self.subTest(old=old, new=new):
+                old_result = self.set_result(old)
+                scoring.score_match(self.match)
+                self.set_result(new)
+                scoring.correct_match(self.match, old_result)
+                corrected = self.points()
+
+                scoring.score_match(self.match)
+                self.assertEqual(corrected, self.points())
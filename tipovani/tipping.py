@@ -0,0 +1,54 @@
+# TIPPING
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .forms import MatchTipForm
+from .models import Match, MatchTip
+
+SAVED = 'ulozeno'
+LOCKED = 'uzamceno'
+NOT_FOUND = 'neexistuje'
+INVALID = 'neplatny'
+
+
+def save_tips(user, rows):
+    # rows: {match_id: data pro MatchTipForm}; vrací {match_id: stav}
+    results = {}
+    valid = {}
+    for match_id, data in rows.items():
+        form = MatchTipForm(data)
+        if form.is_valid():
+            valid[match_id] = form.cleaned_data
+        else:
+            results[match_id] = INVALID
+
+    # Stav zámku všech zápasů jedním dotazem
+    states = {
+        match_id: locked or is_finished
+        for match_id, locked, is_finished in Match.objects.with_lock_state(timezone.now())
+        .filter(id__in=list(valid))
+        .values_list('id', 'locked', 'is_finished')
+    }
+
+    tips = []
+    for match_id, cleaned in valid.items():
+        if match_id not in states:
+            results[match_id] = NOT_FOUND
+        elif states[match_id]:
+            results[match_id] = LOCKED
+        else:
+            tips.append(MatchTip(user=user, match_id=match_id, **cleaned))
+            results[match_id] = SAVED
+
+    if tips:
+        with transaction.atomic():
+            MatchTip.objects.bulk_create(
+                tips,
+                update_conflicts=True,
+                unique_fields=['user', 'match'],
+                update_fields=['home_score_tip', 'away_score_tip', 'question_answer'],
+            )
+            caching.bump_tip_version(user)
+
+    return results
@@ -9,17 +9,22 @@ urlpatterns = [
     #path('logout/', LogoutView.as_view(), name='logout'),
     path('logout/', views.custom_logout, name='logout'),
     path('zapasy/', views.zapasy, name='zapasy'),
+    path('zapasy/hromadne/', views.hromadne_tipy, name='hromadne_tipy'),
     path('poradi-tymu/', views.poradi_tymu, name='poradi_tymu'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
     #path('zobrazit-zapasy/', views.zamcene_zapasy, name='zamcene_zapasy'),
     path('zobrazit-zapas/<int:match_id>/', views.tipovani_k_zapasu, name='tipovani_k_zapasu'),
     path('ostatni-poradi/', views.ostatni_poradi, name='ostatni_poradi'),
+    path('porovnani/<int:user_id>/', views.porovnani, name='porovnani'),
 
 
     
     # Admin URLs
     path('admin-panel/', views.admin_dashboard, name='admin_dashboard'),
     path('admin-panel/pridat-zapas/', views.pridat_zapas, name='pridat_zapas'),
+    path('admin-panel/import-zapasu/', views.importovat_zapasy, name='importovat_zapasy'),
+    path('admin-panel/ulohy/', views.stav_uloh, name='stav_uloh'),
+    path('admin-panel/export/<str:dataset>/', views.exportovat, name='exportovat'),
     path('admin-panel/zadat-vysledek/<int:match_id>/', views.zadat_vysledek, name='zadat_vysledek'),
     path('admin-panel/vyhodnotit-poradi/', views.vyhodnotit_poradi, name='vyhodnotit_poradi'),
 ]
\ No newline at end of file
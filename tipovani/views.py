@@ -1,16 +1,28 @@
 # views.py
+import json
+import re
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.utils import timezone
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.http import JsonResponse
+from django.db.models import Max, Min
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from datetime import timedelta
-from .models import UserProfile, Match, MatchTip, Team, TeamRanking, TeamRankingItem
+from . import caching, exports, history, importers, jobs, matrix, projection, snapshots, standings, tipping
+from .instrumentation import mark_rebuild
+from .models import (UserProfile, Job, Match, MatchTip, Team, TeamRanking, TeamRankingItem,
+                     season_label, season_of)
 from .forms import (CustomLoginForm, MatchTipForm, TeamRankingForm, 
-                   MatchForm, MatchResultForm, TeamCorrectRankingForm)
+                   MatchForm, MatchImportForm, MatchResultForm, TeamCorrectRankingForm)
 
 def custom_login(request):
     if request.method == 'POST':
@@ -32,6 +44,8 @@ def custom_logout(request):
     return redirect('login')
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=caching.dashboard_etag)
 def dashboard(request):
     profile, created = UserProfile.objects.get_or_create(user=request.user)
     
@@ -46,27 +60,40 @@ def dashboard(request):
         team_ranking = None
         ranking_items = []
     
+    # Profil je načtený - hlavička ani klíč fragmentů ho nemusí číst znovu
+    request._user_points = profile.points
+    request._tip_version = profile.tip_version
+    fragment_version = caching.fragment_version(request)
+    if not cache.has_key(make_template_fragment_key('dashboard_tipy', [fragment_version])):
+        mark_rebuild()
+    
+    projected = projection.current(request)
+    season = season_of(timezone.now())
+    points_matrix = matrix.current(request)
+    
     context = {
         'profile': profile,
+        'fragment_version': fragment_version,
+        'season_label': season_label(season),
+        'rank_chart': caching.versioned(
+            request, f'rank_chart:{request.user.pk}:{season}',
+            lambda: history.chart(history.for_user(request.user, season)),
+        ),
+        'tip_stats': points_matrix.stats(request.user.pk, season),
+        'recent_points': points_matrix.series(request.user.pk, season)[-10:],
         'tips': tips,
         'team_ranking': team_ranking,
         'ranking_items': ranking_items,
+        'projection': projected,
+        'my_projection': projected.for_user(request.user.pk),
     }
     
     return render(request, 'tipovani/dashboard.html', context)
 
+MATCHES_PER_PAGE = 20
+
 @login_required
 def zapasy(request):
-    matches = Match.objects.all().order_by('datetime')
-    
-    # Získat všechny tipy uživatele a vytvořit dictionary {match_id: tip}
-    user_tips_list = MatchTip.objects.filter(user=request.user)
-    user_tips_dict = {tip.match_id: tip for tip in user_tips_list}
-    
-    # Přidat tip k každému zápasu
-    for match in matches:
-        match.user_tip = user_tips_dict.get(match.id)
-    
     if request.method == 'POST':
         match_id = request.POST.get('match_id')
         match = get_object_or_404(Match, id=match_id)
@@ -77,33 +104,113 @@ def zapasy(request):
         
         form = MatchTipForm(request.POST)
         if form.is_valid():
-            tip, created = MatchTip.objects.get_or_create(
+            MatchTip.objects.update_or_create(
                 user=request.user,
                 match=match,
                 defaults={
                     'home_score_tip': form.cleaned_data['home_score_tip'],
-                    'away_score_tip': form.cleaned_data['away_score_tip']
+                    'away_score_tip': form.cleaned_data['away_score_tip'],
+                    'question_answer': form.cleaned_data['question_answer'],
                 }
             )
             
-            if not created:
-                tip.home_score_tip = form.cleaned_data['home_score_tip']
-                tip.away_score_tip = form.cleaned_data['away_score_tip']
-                tip.question_answer = form.cleaned_data['question_answer']  # 🟢 DŮLEŽITÝ ŘÁDEK!
-
-                tip.save()
-            
+            caching.bump_tip_version(request.user)
             messages.success(request, 'Tip byl uložen!')
             return redirect('zapasy')
     
+    now = timezone.now()
+    seasons = Match.objects.aggregate(first=Min('datetime'), last=Max('datetime'))
+    current_season = season_of(now)
+    if seasons['first']:
+        season_range = range(season_of(seasons['last']), season_of(seasons['first']) - 1, -1)
+    else:
+        season_range = [current_season]
+    
+    try:
+        season = int(request.GET.get('sezona', current_season))
+    except ValueError:
+        season = current_season
+    finished = request.GET.get('stav') == 'odehrane'
+    
+    # Zámek i tip uživatele se spočítají přímo v dotazu
+    matches = (
+        Match.objects.in_season(season)
+        .filter(is_finished=finished)
+        .with_lock_state(now)
+        .with_user_tip(request.user)
+        .order_by('-datetime' if finished else 'datetime')
+    )
+    page = Paginator(matches, MATCHES_PER_PAGE).get_page(request.GET.get('strana'))
+    
     context = {
-        'matches': matches,
+        'matches': page,
+        'page': page,
         'tip_form': MatchTipForm(),
-        'now': timezone.now(),
+        'now': now,
+        'season': season,
+        'seasons': [(start, season_label(start)) for start in season_range],
+        'finished': finished,
     }
     
     return render(request, 'tipovani/zapasy.html', context)
 
+TIP_PREFIX = re.compile(r'^tip-(\d+)-')
+
+@login_required
+def hromadne_tipy(request):
+    if request.method == 'POST':
+        if request.content_type == 'application/json':
+            try:
+                payload = json.loads(request.body)
+                rows = {int(row.pop('match_id')): row for row in payload['tips']}
+            except (ValueError, KeyError, TypeError, AttributeError):
+                return JsonResponse({'error': 'Neplatná data'}, status=400)
+            
+            results = tipping.save_tips(request.user, rows)
+            return JsonResponse({'results': {str(match_id): status for match_id, status in results.items()}})
+        
+        # Formulář s řádky tip-<match_id>-<pole>, prázdné řádky se přeskočí
+        rows = {}
+        for key in request.POST:
+            found = TIP_PREFIX.match(key)
+            if found:
+                match_id = int(found.group(1))
+                prefix = f'tip-{match_id}-'
+                rows[match_id] = {
+                    field: request.POST.get(prefix + field)
+                    for field in ('home_score_tip', 'away_score_tip', 'question_answer')
+                }
+        rows = {
+            match_id: data for match_id, data in rows.items()
+            if data['home_score_tip'] not in (None, '') or data['away_score_tip'] not in (None, '')
+        }
+        
+        results = tipping.save_tips(request.user, rows)
+        saved = sum(1 for status in results.values() if status == tipping.SAVED)
+        if saved:
+            messages.success(request, f'Uloženo tipů: {saved}')
+        failed = len(results) - saved
+        if failed:
+            messages.error(request, f'Neuloženo tipů: {failed} (uzamčené nebo neplatné zápasy)')
+        return redirect('zapasy')
+    
+    matches = (
+        Match.objects.with_lock_state()
+        .filter(locked=False, is_finished=False)
+        .with_user_tip(request.user)
+        .order_by('datetime')
+    )
+    rows = [
+        (match, MatchTipForm(prefix=f'tip-{match.id}', initial={
+            'home_score_tip': match.tip_home,
+            'away_score_tip': match.tip_away,
+            'question_answer': match.tip_answer,
+        }))
+        for match in matches
+    ]
+    
+    return render(request, 'tipovani/hromadne_tipy.html', {'rows': rows})
+
 @login_required
 def poradi_tymu(request):
     try:
@@ -156,6 +263,9 @@ def poradi_tymu(request):
                         team=team,
                         position=position
                     )
+                
+                caching.bump_tip_version(request.user)
+                transaction.on_commit(projection.invalidate)
             
             messages.success(request, 'Pořadí týmů bylo úspěšně odevzdáno!')
             return redirect('poradi_tymu')
@@ -165,9 +275,30 @@ def poradi_tymu(request):
     return render(request, 'tipovani/poradi_tymu.html', {'form': form})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=caching.leaderboard_etag, last_modified_func=caching.scoring_last_modified)
 def leaderboard(request):
-    profiles = UserProfile.objects.select_related('user').order_by('-points')
-    return render(request, 'tipovani/leaderboard.html', {'profiles': profiles})
+    cursor = request.GET.get('po', '')
+    rows, next_cursor = caching.versioned(
+        request, f'leaderboard:{cursor}', lambda: standings.page(standings.parse_cursor(cursor))
+    )
+    my_standing, around_me = caching.versioned(
+        request, f'around:{request.user.pk}', lambda: standings.with_neighbours(request.user)
+    )
+    
+    projected = projection.current(request)
+    for standing in rows:
+        standing.projection = projected.for_user(standing.user_id)
+    
+    return render(request, 'tipovani/leaderboard.html', {
+        'standings': rows,
+        'projection': projected,
+        'my_projection': projected.for_user(request.user.pk),
+        'next_cursor': next_cursor,
+        'is_first_page': 'po' not in request.GET,
+        'my_standing': my_standing,
+        'around_me': around_me,
+    })
 
 # Admin views
 @login_required
@@ -177,7 +308,40 @@ def admin_dashboard(request):
         return redirect('dashboard')
     
     matches = Match.objects.all().order_by('-datetime')[:10]
-    return render(request, 'tipovani/admin/admin_dashboard.html', {'matches': matches})
+    recent_jobs = list(Job.objects.select_related('match').order_by('-created_at')[:10])
+    return render(request, 'tipovani/admin/admin_dashboard.html', {
+        'matches': matches,
+        'jobs': recent_jobs,
+        'jobs_active': any(job.is_active for job in recent_jobs),
+    })
+
+@login_required
+def stav_uloh(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Nemáte oprávnění'}, status=403)
+    
+    ids = [int(job_id) for job_id in request.GET.get('id', '').split(',') if job_id.isdigit()]
+    return JsonResponse({'jobs': list(
+        Job.objects.filter(pk__in=ids).values('id', 'status', 'progress', 'message')
+    )})
+
+@login_required
+def exportovat(request, dataset):
+    if not request.user.is_staff:
+        messages.error(request, 'Nemáte oprávnění pro přístup do admin sekce!')
+        return redirect('dashboard')
+    
+    export_format = request.GET.get('format', 'csv')
+    if dataset not in exports.DATASETS or export_format not in exports.FORMATS:
+        raise Http404('Neznámý export')
+    
+    # Řádky se čtou a posílají po dávkách - paměť nezávisí na velikosti tabulky
+    response = StreamingHttpResponse(
+        exports.stream(dataset, export_format), content_type=exports.FORMATS[export_format]
+    )
+    filename = f'{dataset}-{timezone.localdate():%Y-%m-%d}.{export_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 @login_required
 def pridat_zapas(request):
@@ -196,6 +360,41 @@ def pridat_zapas(request):
     
     return render(request, 'tipovani/admin/pridat_zapas.html', {'form': form})
 
+@login_required
+def importovat_zapasy(request):
+    if not request.user.is_staff:
+        messages.error(request, 'Nemáte oprávnění pro přístup do admin sekce!')
+        return redirect('dashboard')
+    
+    errors = []
+    if request.method == 'POST':
+        form = MatchImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                text = form.cleaned_data['schedule'].read().decode('utf-8-sig')
+                result = importers.import_matches(text, dry_run=form.cleaned_data['dry_run'])
+            except UnicodeDecodeError:
+                errors = ['Soubor musí být v kódování UTF-8']
+            except importers.ScheduleError as exc:
+                errors = exc.errors
+            else:
+                if form.cleaned_data['dry_run']:
+                    messages.info(
+                        request,
+                        f'Kontrola v pořádku: nových {result.created}, změněných {result.updated}, beze změny {result.unchanged}'
+                    )
+                    return render(request, 'tipovani/admin/import_zapasu.html', {'form': form})
+
+                messages.success(
+                    request,
+                    f'Rozpis naimportován: nových {result.created}, změněných {result.updated}, beze změny {result.unchanged}'
+                )
+                return redirect('admin_dashboard')
+    else:
+        form = MatchImportForm()
+    
+    return render(request, 'tipovani/admin/import_zapasu.html', {'form': form, 'errors': errors})
+
 @login_required
 def zadat_vysledek(request, match_id):
     if not request.user.is_staff:
@@ -205,25 +404,27 @@ def zadat_vysledek(request, match_id):
     match = get_object_or_404(Match, id=match_id)
     
     if request.method == 'POST':
+        # Formulář přepisuje instanci už při validaci - původní výsledek uložit předem
+        old_result = {
+            'is_finished': match.is_finished,
+            'home_score': match.home_score,
+            'away_score': match.away_score,
+            'correct_answer': match.correct_answer,
+        }
         form = MatchResultForm(request.POST, instance=match)
         if form.is_valid():
-            match = form.save()
-            match.is_finished = True
-            match.save()
-            
-            # Přepočítat body pro všechny tipy
-            tips = MatchTip.objects.filter(match=match)
-            for tip in tips:
-                tip.points_earned = tip.calculate_points()
-                tip.save()
+            with transaction.atomic():
+                match = form.save(commit=False)
+                match.is_finished = True
+                match.save()
                 
-                # Aktualizovat celkové body uživatele
-                profile, created = UserProfile.objects.get_or_create(user=tip.user)
-                total_points = sum(t.points_earned for t in MatchTip.objects.filter(user=tip.user))
-                profile.points = total_points
-                profile.save()
+                # Přepočet bodů proběhne ve workeru (run_jobs)
+                job = jobs.score_match_later(match, old_result)
             
-            messages.success(request, 'Výsledek byl úspěšně zadán a body přepočítány!')
+            messages.success(
+                request,
+                f'Výsledek byl úspěšně zadán, přepočet bodů je ve frontě (úloha #{job.pk}).'
+            )
             return redirect('admin_dashboard')
     else:
         form = MatchResultForm(instance=match)
@@ -239,6 +440,8 @@ def zamcene_zapasy(request):
     return render(request, 'tipovani/zamcene_zapasy.html', {'matches': matches})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=caching.match_tips_etag, last_modified_func=caching.scoring_last_modified)
 def tipovani_k_zapasu(request, match_id):
     match = get_object_or_404(Match, id=match_id)
 
@@ -246,11 +449,29 @@ def tipovani_k_zapasu(request, match_id):
         messages.error(request, 'Zápas ještě není uzamčen.')
         return redirect('zamcene_zapasy')
 
-    tips = MatchTip.objects.filter(match=match).select_related('user')
+    snapshot = caching.versioned(request, f'match_tips:{match.id}', lambda: snapshots.for_match(match))
 
     return render(request, 'tipovani/tipy_k_zapasu.html', {
         'match': match,
-        'tips': tips
+        'snapshot': snapshot,
+        'tips': snapshot.tip_rows(),
+    })
+
+@login_required
+def porovnani(request, user_id):
+    other = get_object_or_404(User.objects.only('id', 'username'), pk=user_id)
+    season = season_of(timezone.now())
+    
+    # Vše se počítá z matice bodů v paměti, bez dotazů na tipy
+    points_matrix = matrix.current(request)
+    return render(request, 'tipovani/porovnani.html', {
+        'other': other,
+        'season_label': season_label(season),
+        'head_to_head': points_matrix.head_to_head(request.user.pk, other.pk, season),
+        'players': [
+            (request.user.username, points_matrix.stats(request.user.pk, season)),
+            (other.username, points_matrix.stats(other.pk, season)),
+        ],
     })
 
 @login_required
@@ -265,13 +486,12 @@ def ostatni_poradi(request):
         messages.error(request, 'Nejdříve musíš odevzdat své pořadí.')
         return redirect('poradi_tymu')
 
-    all_rankings = TeamRanking.objects.filter(is_submitted=True).select_related('user')
-    all_items = {
-        ranking.user.username: list(TeamRankingItem.objects.filter(ranking=ranking).select_related('team').order_by('position'))
-        for ranking in all_rankings
-    }
+    rankings = caching.submitted_rankings()
 
-    return render(request, 'tipovani/ostatni_poradi.html', {'all_items': all_items})
+    return render(request, 'tipovani/ostatni_poradi.html', {
+        'rankings': rankings,
+        'matrix_view': request.GET.get('zobrazeni') == 'matice',
+    })
 
 
 @login_required
@@ -294,30 +514,15 @@ def vyhodnotit_poradi(request):
                     return render(request, 'tipovani/admin/vyhodnotit_poradi.html', {'form': form})
                 positions.append(position)
             
-            # Uložit správné pořadí
-            with transaction.atomic():
-                for team in teams:
-                    position = form.cleaned_data[f'team_{team.id}']
-                    team.position = position
-                    team.save()
-                
-                # Vyhodnotit všechna odevzdaná pořadí
-                submitted_rankings = TeamRanking.objects.filter(is_submitted=True)
-                
-                for ranking in submitted_rankings:
-                    points = 0
-                    ranking_items = TeamRankingItem.objects.filter(ranking=ranking)
-                    
-                    for item in ranking_items:
-                        if item.team.position == item.position:
-                            points += 3
-                    
-                    # Přidat body k uživatelovu profilu
-                    profile, created = UserProfile.objects.get_or_create(user=ranking.user)
-                    profile.points += points
-                    profile.save()
+            # Uložit správné pořadí a vyhodnotit všechna odevzdaná pořadí ve workeru
+            job = jobs.evaluate_rankings_later({
+                team.id: form.cleaned_data[f'team_{team.id}'] for team in teams
+            })
             
-            messages.success(request, f'Pořadí bylo vyhodnoceno! Bylo uděleno celkem bodů všem uživatelům.')
+            messages.success(
+                request,
+                f'Správné pořadí bylo přijato, vyhodnocení je ve frontě (úloha #{job.pk}).'
+            )
             return redirect('admin_dashboard')
     else:
         form = TeamCorrectRankingForm()